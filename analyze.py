@@ -0,0 +1,258 @@
+"""
+Annotate recorded games with engine scores and best moves.
+
+Usage:
+    python analyze.py games.txt analysis.jsonl [--movetime MS] [--depth N] [--multipv K] [--workers N]
+
+The game file holds one game per line as a space-separated list of moves (e.g. "a1-c3 h7-f5 ...")
+played from the starting position, black first. A game may instead start from another position
+by beginning the line with "layout <layout> <b|w>" (see Board.to_string). Blank lines and lines
+starting with '#' are ignored.
+
+Every distinct position is analysed once. Results are appended to the output file as JSON lines
+as soon as they complete, and positions already present in the output file are skipped, so an
+interrupted run can be resumed by running the same command again.
+"""
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import json
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from halma.board import Board
+from halma.notation import format_move, parse_move
+from minimax.algorithm import BLACK, WHITE
+from minimax.context import SearchContext, position_key
+from minimax.search import search_multipv
+
+COLOR_NAMES = {'b': BLACK, 'w': WHITE}
+
+# Search state of the current worker process, kept warm between positions
+_context = None
+
+
+def read_games(path):
+    """
+    Read games from a game file.
+
+    A line with an invalid layout is reported on stderr and skipped.
+
+    Parameters:
+        path (str): The path of the game file.
+
+    Yields:
+        (int, Board, tuple, list): The line number, starting board, color to move and moves of every game.
+    """
+    with open(path) as file:
+        for number, line in enumerate(file, 1):
+            tokens = line.split()
+            if not tokens or tokens[0].startswith('#'):
+                continue
+            if tokens[0] == 'layout':
+                if len(tokens) < 3 or tokens[2] not in COLOR_NAMES:
+                    print(f"line {number}: expected 'layout <layout> <b|w>'", file=sys.stderr)
+                    continue
+                try:
+                    board = Board.from_string(tokens[1])
+                except ValueError as error:
+                    print(f"line {number}: {error}", file=sys.stderr)
+                    continue
+                yield number, board, COLOR_NAMES[tokens[2]], tokens[3:]
+            else:
+                yield number, Board(), BLACK, tokens
+
+
+def read_positions(path):
+    """
+    Replay every game in a game file and produce each position reached.
+
+    A game containing an illegal move is reported on stderr and its remaining
+    moves are skipped.
+
+    Parameters:
+        path (str): The path of the game file.
+
+    Yields:
+        (int, str, str): The position key, position string and side to move ('b' or 'w').
+    """
+    for number, board, turn, moves in read_games(path):
+        for text in moves + [None]:
+            yield position_key(board, turn == WHITE), board.to_string(), 'w' if turn == WHITE else 'b'
+            if text is None:
+                break
+            try:
+                board.play(parse_move(text), turn)
+            except ValueError as error:
+                print(f"line {number}: {error}", file=sys.stderr)
+                break
+            turn = BLACK if turn == WHITE else WHITE
+
+
+class KeySet:
+    """
+    A set of position keys kept in a temporary SQLite database on disk, so that
+    memory use does not grow with the number of positions in the archive.
+
+    Attributes:
+        db (sqlite3.Connection): The connection to the database, which SQLite deletes on close.
+    """
+    def __init__(self):
+        # An empty file name gives a private temporary database on disk
+        self.db = sqlite3.connect('')
+        self.db.execute('PRAGMA journal_mode = OFF')
+        self.db.execute('PRAGMA synchronous = OFF')
+        self.db.execute('CREATE TABLE keys (key INTEGER PRIMARY KEY)')
+
+    def add(self, key):
+        """
+        Add a position key.
+
+        Parameters:
+            key (int): The unsigned 64-bit position key.
+
+        Returns:
+            bool: True if the key was not in the set yet.
+        """
+        # SQLite integers are signed
+        signed = key - (1 << 64) if key >= 1 << 63 else key
+        return self.db.execute('INSERT OR IGNORE INTO keys VALUES (?)', (signed,)).rowcount == 1
+
+    def close(self):
+        """
+        Close and delete the database.
+        """
+        self.db.close()
+
+
+def read_done(path):
+    """
+    Read the keys of the positions already written to an output file.
+
+    Parameters:
+        path (str): The path of the output file.
+
+    Yields:
+        int: The position keys found. A truncated last line is ignored.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path) as file:
+        for line in file:
+            try:
+                yield int(json.loads(line)['key'], 16)
+            except (ValueError, KeyError):
+                continue
+
+
+def end_last_line(path):
+    """
+    Make sure an output file ends with a newline, so new records start on a line of their own.
+
+    A run that was killed while writing leaves a truncated last line behind, and appending
+    straight after it would corrupt the first new record.
+
+    Parameters:
+        path (str): The path of the output file.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, 'rb+') as file:
+        file.seek(-1, os.SEEK_END)
+        if file.read(1) != b'\n':
+            file.write(b'\n')
+
+
+def analyse_position(layout, color, depth, movetime, multipv):
+    """
+    Analyse a single position. Runs in a worker process.
+
+    Parameters:
+        layout (str): The position string.
+        color (str): The side to move, 'b' or 'w'.
+        depth (int): The maximum search depth, or None.
+        movetime (float): The time limit in seconds, or None.
+        multipv (int): The number of best moves to report.
+
+    Returns:
+        list: The search lines, as returned by search_multipv, with moves in text form.
+    """
+    global _context
+    if _context is None:
+        _context = SearchContext()
+
+    lines = search_multipv(Board.from_string(layout), COLOR_NAMES[color], multipv, depth, movetime,
+                           context=_context)
+    return [{
+        'move': format_move(line['move']),
+        'score': line['score'],
+        'depth': line['depth'],
+        'pv': [format_move(move) for move in line['pv']],
+    } for line in lines]
+
+
+def main():
+    """
+    Parse the command line arguments and run the analysis.
+    """
+    parser = argparse.ArgumentParser(description="Annotate recorded Halma games with engine analysis.")
+    parser.add_argument('games', help="game file to read")
+    parser.add_argument('output', help="JSON lines file to append results to")
+    parser.add_argument('--movetime', type=int, default=1000, help="time limit per position in milliseconds")
+    parser.add_argument('--depth', type=int, default=None, help="maximum search depth per position")
+    parser.add_argument('--multipv', type=int, default=1, help="number of best moves to report per position")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="number of worker processes")
+    args = parser.parse_args()
+    if not args.movetime and args.depth is None:
+        parser.error("--movetime 0 needs a --depth, or the search never ends")
+    if args.multipv < 1:
+        parser.error("--multipv must be at least 1")
+
+    movetime = args.movetime / 1000 if args.movetime else None
+    seen = KeySet()
+    for key in read_done(args.output):
+        seen.add(key)
+    end_last_line(args.output)
+    # Keep only a few positions per worker in flight, and the keys of the positions seen on
+    # disk, so memory does not depend on the archive size
+    max_pending = args.workers * 4
+
+    with open(args.output, 'a') as output, ProcessPoolExecutor(args.workers) as pool:
+        pending = {}
+
+        def write_finished(futures):
+            for future in futures:
+                key, layout, color = pending.pop(future)
+                try:
+                    lines = future.result()
+                except Exception as error:
+                    # Left out of the output, so a resumed run tries the position again
+                    print(f"position {layout} {color}: {error!r}", file=sys.stderr)
+                    continue
+                output.write(json.dumps({
+                    'key': f"{key:016x}",
+                    'layout': layout,
+                    'color': color,
+                    'bestmove': lines[0]['move'] if lines else None,
+                    'score': lines[0]['score'] if lines else None,
+                    'depth': lines[0]['depth'] if lines else None,
+                    'lines': lines,
+                }) + '\n')
+            output.flush()
+
+        for key, layout, color in read_positions(args.games):
+            if not seen.add(key):
+                continue
+            future = pool.submit(analyse_position, layout, color, args.depth, movetime, args.multipv)
+            pending[future] = key, layout, color
+            if len(pending) >= max_pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                write_finished(finished)
+
+        write_finished(wait(pending).done)
+    seen.close()
+
+
+if __name__ == '__main__':
+    main()
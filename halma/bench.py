@@ -0,0 +1,177 @@
+"""
+Microbenchmark of the precomputed geometry tables.
+
+Run it with "python -m halma.bench". It times move generation, evaluation and the winner
+check of Board against reference copies of the implementations that recomputed the board
+geometry on every call, after checking that both give the same results.
+"""
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import random
+import timeit
+from halma.board import Board
+from halma.constants import *
+
+
+def reference_is_valid_square(row, col):
+    """
+    The bounds check used by the reference move generator.
+    """
+    if row < 0 or row >= ROWS or col < 0 or col >= COLS:
+        return False
+    return True
+
+
+def reference_valid_moves(board, piece):
+    """
+    Reference copy of the move generator that iterated over [-1, 0, 1] offsets.
+    """
+    moves = []
+    for drow in [-1, 0, 1]:
+        for dcol in [-1, 0, 1]:
+            if drow == 0 and dcol == 0:
+                continue
+            row = piece.row + drow
+            col = piece.col + dcol
+            if reference_is_valid_square(row, col):
+                square = board.board[row][col]
+                if square == 0:
+                    moves.append((row, col))
+                if square != 0:
+                    next_row = row + drow
+                    next_col = col + dcol
+                    if reference_is_valid_square(next_row, next_col) and board.board[next_row][next_col] == 0:
+                        moves.append((next_row, next_col))
+                        visited = [(piece.row, piece.col)]
+                        moves += reference_check_jumps(board, next_row, next_col, visited)
+    return moves
+
+
+def reference_check_jumps(board, row, col, visited):
+    """
+    Reference copy of the recursive jump search.
+    """
+    valid_jumps = []
+    for drow in [-1, 0, 1]:
+        for dcol in [-1, 0, 1]:
+            if drow == 0 and dcol == 0:
+                continue
+            next_row = row + drow
+            next_col = col + dcol
+            if reference_is_valid_square(next_row, next_col) and board.board[next_row][next_col] != 0:
+                jump_row = next_row + drow
+                jump_col = next_col + dcol
+                if (reference_is_valid_square(jump_row, jump_col) and
+                        board.board[jump_row][jump_col] == 0 and (jump_row, jump_col) not in visited):
+                    valid_jumps.append((jump_row, jump_col))
+                    visited.append((jump_row, jump_col))
+                    valid_jumps += reference_check_jumps(board, jump_row, jump_col, visited)
+    return valid_jumps
+
+
+def reference_features(board):
+    """
+    Reference copy of the evaluation factors, which searched the starting zone lists.
+    """
+    black_distance = white_distance = 0
+    for row in range(8):
+        for col in range(8):
+            piece = board.get_piece(row, col)
+            if piece != 0 and piece.color == BLACK:
+                black_distance += abs(row - 0) + abs(col - 0)
+            elif piece != 0 and piece.color == WHITE:
+                white_distance += abs(row - 7) + abs(col - 7)
+
+    black_proximity = white_proximity = 0
+    for row in range(8):
+        for col in range(8):
+            piece = board.get_piece(row, col)
+            if piece != 0 and piece.color == BLACK and (row, col) in WHITE_START:
+                black_proximity += 1
+            elif piece != 0 and piece.color == WHITE and (row, col) in BLACK_START:
+                white_proximity += 1
+
+    black_start_penalty = white_start_penalty = 0
+    for row, col in BLACK_START:
+        piece = board.get_piece(row, col)
+        if piece != 0 and piece.color == BLACK:
+            black_start_penalty += 1
+    for row, col in WHITE_START:
+        piece = board.get_piece(row, col)
+        if piece != 0 and piece.color == WHITE:
+            white_start_penalty += 1
+
+    return (white_distance - black_distance,
+            white_proximity - black_proximity,
+            white_start_penalty - black_start_penalty)
+
+
+def reference_winner(board):
+    """
+    Reference copy of the winner check, which searched the starting zone lists.
+    """
+    white_wins = all(piece.position() in BLACK_START for piece in board.get_all_pieces(WHITE))
+    black_wins = all(piece.position() in WHITE_START for piece in board.get_all_pieces(BLACK))
+    if white_wins and not black_wins:
+        return "White wins"
+    elif black_wins and not white_wins:
+        return "Black wins"
+    return None
+
+
+def sample_boards(count, seed=0):
+    """
+    Returns boards reached by random play from the starting position.
+
+    Parameters:
+        count (int): The number of boards.
+        seed (int): The random seed.
+
+    Returns:
+        list: The boards.
+    """
+    rng = random.Random(seed)
+    boards = []
+    board, color = Board(), BLACK
+    while len(boards) < count:
+        moves = [(piece, move) for piece in board.get_all_pieces(color) for move in board.get_valid_moves(piece)]
+        piece, (row, col) = rng.choice(moves)
+        board.move(piece, row, col)
+        color = WHITE if color == BLACK else BLACK
+        boards.append(Board.from_string(board.to_string()))
+        if len(boards) % 60 == 0:
+            board, color = Board(), BLACK
+    return boards
+
+
+def main():
+    """
+    Check the tables against the reference code and time both.
+    """
+    boards = sample_boards(300)
+    pieces = [(board, piece) for board in boards for piece in board.get_all_pieces(BLACK) + board.get_all_pieces(WHITE)]
+
+    for board, piece in pieces:
+        assert board.get_valid_moves(piece) == reference_valid_moves(board, piece)
+    for board in boards:
+        assert board.features() == reference_features(board)
+        assert board.winner() == reference_winner(board)
+
+    benchmarks = [
+        ("move generation", lambda: [reference_valid_moves(board, piece) for board, piece in pieces],
+         lambda: [board.get_valid_moves(piece) for board, piece in pieces]),
+        ("evaluation", lambda: [reference_features(board) for board in boards],
+         lambda: [board.features() for board in boards]),
+        ("winner check", lambda: [reference_winner(board) for board in boards],
+         lambda: [board.winner() for board in boards]),
+    ]
+    for name, reference, tables in benchmarks:
+        reference_time = min(timeit.repeat(reference, number=5, repeat=3))
+        tables_time = min(timeit.repeat(tables, number=5, repeat=3))
+        print(f"{name:>16}: {reference_time * 1000:8.1f} ms -> {tables_time * 1000:8.1f} ms "
+              f"({reference_time / tables_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
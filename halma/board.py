@@ -1,6 +1,42 @@
+import random
 import pygame
 from halma.constants import *
 from halma.piece import Piece
+from halma.geometry import DIRECTIONS, JUMPS, SQUARE_BITS, ZONE_MASKS, HOME_DISTANCE
+from halma.symmetry import SYMMETRIES, swaps_colors, transform_square, opposite
+from halma.weights import EVAL_WEIGHTS
+
+# Zobrist keys for every (color, row, col) combination. A fixed seed keeps the
+# hashes identical across processes so they can be shared between workers.
+_rng = random.Random(0x4A1A)
+ZOBRIST_KEYS = {
+    color: [[_rng.getrandbits(64) for _ in range(COLS)] for _ in range(ROWS)]
+    for color in (BLACK, WHITE)
+}
+
+# Key mixed into the position hash when white is to move
+WHITE_TO_MOVE = 0x9E3779B97F4A7C15
+
+
+def _symmetric_keys(symmetry):
+    """
+    Returns the Zobrist keys of the images of every (color, row, col) under a symmetry.
+    XOR-ing these keys gives the hash the board would have after applying the symmetry.
+    """
+    keys = {}
+    for color in (BLACK, WHITE):
+        image_color = opposite(color) if swaps_colors(symmetry) else color
+        keys[color] = []
+        for row in range(ROWS):
+            images = [transform_square(symmetry, row, col) for col in range(COLS)]
+            keys[color].append([ZOBRIST_KEYS[image_color][r][c] for r, c in images])
+    return keys
+
+
+SYMMETRIC_KEYS = [_symmetric_keys(symmetry) for symmetry in SYMMETRIES]
+
+# Characters used by the compact position string
+LAYOUT_CHARS = {BLACK: 'b', WHITE: 'w'}
 
 
 class Board:
@@ -9,9 +45,14 @@ class Board:
 
     Attributes:
         board (list): A 2D list representing the state of the board.
+        hashes (list): The Zobrist hash of the piece placement under every symmetry in
+            halma.symmetry.SYMMETRIES, updated incrementally on every move.
+        last_move (tuple): The ((row, col), (row, col)) move that produced this board, or None.
     """
     def __init__(self):
         self.board = []
+        self.hashes = [0] * len(SYMMETRIES)
+        self.last_move = None
         self.create_board()
 
     def draw_board(self, win):
@@ -97,6 +138,109 @@ class Board:
         for row, col in white_positions:
             self.board[row][col] = Piece(row, col, WHITE)
 
+        self.hashes = self.compute_hashes()
+
+    @property
+    def hash(self):
+        """
+        The Zobrist hash of the piece placement as it is.
+        """
+        return self.hashes[0]
+
+    def key(self, color):
+        """
+        Returns the hash of the board together with the side to move.
+
+        Parameters:
+            color (tuple): The color of the player to move.
+
+        Returns:
+            int: The position key.
+        """
+        return self.hashes[0] ^ WHITE_TO_MOVE if color == WHITE else self.hashes[0]
+
+    def compute_hashes(self):
+        """
+        Compute the Zobrist hashes of the board from scratch.
+
+        Returns:
+            list: For every symmetry, the XOR of the keys of every piece on the board.
+        """
+        hashes = [0] * len(SYMMETRIES)
+        for row in range(ROWS):
+            for col in range(COLS):
+                piece = self.board[row][col]
+                if piece != 0:
+                    for symmetry, keys in enumerate(SYMMETRIC_KEYS):
+                        hashes[symmetry] ^= keys[piece.color][row][col]
+        return hashes
+
+    def to_string(self):
+        """
+        Returns a compact string describing the piece placement.
+
+        Rows are listed top to bottom and separated by '/'. Each row uses 'b' for
+        a black piece, 'w' for a white piece and a digit for a run of empty squares,
+        e.g. the starting position is "bbbb4/bbb5/bb6/b7/7w/6ww/5www/4wwww".
+
+        Returns:
+            str: The position string.
+        """
+        rows = []
+        for row in range(ROWS):
+            text = ''
+            empty = 0
+            for col in range(COLS):
+                piece = self.board[row][col]
+                if piece == 0:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += LAYOUT_CHARS[piece.color]
+            if empty:
+                text += str(empty)
+            rows.append(text)
+        return '/'.join(rows)
+
+    @classmethod
+    def from_string(cls, layout):
+        """
+        Create a board from a position string produced by to_string.
+
+        Parameters:
+            layout (str): The position string.
+
+        Returns:
+            Board: A new board with the described piece placement.
+
+        Raises:
+            ValueError: If the string does not describe an 8x8 board.
+        """
+        colors = {char: color for color, char in LAYOUT_CHARS.items()}
+        rows = layout.strip().split('/')
+        if len(rows) != ROWS:
+            raise ValueError(f"expected {ROWS} rows in position string, got {len(rows)}")
+
+        board = cls()
+        board.board = [[0] * COLS for _ in range(ROWS)]
+        for row, text in enumerate(rows):
+            col = 0
+            for char in text:
+                if char.isdigit():
+                    col += int(char)
+                elif char in colors and col < COLS:
+                    board.board[row][col] = Piece(row, col, colors[char])
+                    col += 1
+                else:
+                    raise ValueError(f"invalid position string row: {text!r}")
+            if col != COLS:
+                raise ValueError(f"invalid position string row: {text!r}")
+
+        board.hashes = board.compute_hashes()
+        return board
+
     def draw(self, win):
         """
         Draw the current state of the board onto the window provided.
@@ -157,27 +301,34 @@ class Board:
             col (int): The column to move the piece to.
         """
 
+        # Update the hashes and remember the move before the piece's position changes
+        hashes = self.hashes
+        for symmetry, keys in enumerate(SYMMETRIC_KEYS):
+            color_keys = keys[piece.color]
+            hashes[symmetry] ^= color_keys[piece.row][piece.col] ^ color_keys[row][col]
+        self.last_move = ((piece.row, piece.col), (row, col))
+
         # Swaps the positions of the pieces on the board and
         # update the piece's position attribute
         self.board[piece.row][piece.col], self.board[row][col] = self.board[row][col], self.board[piece.row][piece.col]
         piece.move(row, col)
 
-    def is_valid_square(self, row, col, color):
+    def play(self, move, color):
         """
-        Check if a given square is a valid square on the board.
+        Play a move for the given color after checking that it is legal.
 
         Parameters:
-            row (int): the row number of the square.
-            col (int): the column number of the square.
-            color (str): the color of the player who owns the piece being moved.
-        Returns:
-            bool: True if the square is valid, False otherwise.
-        """
-        # check if row and col are within board bounds
-        if row < 0 or row >= ROWS or col < 0 or col >= COLS:
-            return False
+            move (tuple): The ((row, col), (row, col)) source and destination squares.
+            color (tuple): The color of the player making the move.
 
-        return True
+        Raises:
+            ValueError: If the move is not legal for the given color.
+        """
+        (from_row, from_col), (to_row, to_col) = move
+        piece = self.get_piece(from_row, from_col)
+        if piece == 0 or piece.color != color or (to_row, to_col) not in self.get_valid_moves(piece):
+            raise ValueError(f"illegal move: {move}")
+        self.move(piece, to_row, to_col)
 
     def get_valid_moves(self, piece):
         """
@@ -191,45 +342,62 @@ class Board:
             the form (row, col), representing the position the piece can move to.
         """
         moves = []
+        board = self.board
+
+        # check all eight directions for valid moves, using the precomputed
+        # adjacent and landing squares of the piece's square
+        for (row, col), landing in DIRECTIONS[piece.row][piece.col]:
+            # check for moves into empty adjacent squares
+            if board[row][col] == 0:
+                moves.append((row, col))
 
-        # check all eight directions for valid moves
-        for drow in [-1, 0, 1]:
-            for dcol in [-1, 0, 1]:
-                if drow == 0 and dcol == 0:
-                    continue  # skip current position
+            # check for jumps over adjacent pieces
+            elif landing is not None and board[landing[0]][landing[1]] == 0:
 
-                # check squares in current direction
-                row = piece.row
-                col = piece.col
-                row += drow
-                col += dcol
+                # add to moves and mark the square as visited
+                moves.append(landing)
+                visited = [(piece.row, piece.col)]
 
-                # check if square is in bounds
-                if self.is_valid_square(row, col, piece.color):
-                    square = self.board[row][col]
+                # recursively check for more valid jumps from the new position
+                jumps = self.check_jumps(piece, landing[0], landing[1], visited)
+                if jumps:
+                    moves += jumps
 
-                    # check for moves into empty adjacent squares
-                    if square == 0:
-                        moves.append((row, col))
+        return moves
+
+    def get_steps(self, piece):
+        """
+        Returns the empty squares adjacent to the given piece.
 
-                    # check for jumps over adjacent pieces
-                    if square != 0:
-                        next_row = row + drow
-                        next_col = col + dcol
+        Parameters:
+            piece (Piece): the piece for which to find steps.
+
+        Returns:
+            A list of (row, col) squares the piece can step to.
+        """
+        board = self.board
+        return [(row, col) for (row, col), _ in DIRECTIONS[piece.row][piece.col] if board[row][col] == 0]
 
-                        # check if jump is valid
-                        if self.is_valid_square(next_row, next_col, piece.color) and \
-                                self.board[next_row][next_col] == 0:
+    def get_jumps(self, piece):
+        """
+        Returns the squares the given piece can reach with one or more jumps.
 
-                            # add to moves and mark the square as visited
-                            moves.append((next_row, next_col))
-                            visited = [(piece.row, piece.col)]
+        Together with get_steps this gives the same squares as get_valid_moves, so a caller
+        that only needs one kind of move does not have to search for the other. A square may
+        be listed more than once.
 
-                            # recursively check for more valid jumps from the new position
-                            jumps = self.check_jumps(piece, next_row, next_col, visited)
-                            if jumps:
-                                moves += jumps
+        Parameters:
+            piece (Piece): the piece for which to find jumps.
 
+        Returns:
+            A list of (row, col) squares the piece can jump to.
+        """
+        moves = []
+        board = self.board
+        for (row, col), landing in DIRECTIONS[piece.row][piece.col]:
+            if board[row][col] != 0 and landing is not None and board[landing[0]][landing[1]] == 0:
+                moves.append(landing)
+                moves += self.check_jumps(piece, landing[0], landing[1], [(piece.row, piece.col)])
         return moves
 
     def check_jumps(self, piece, row, col, visited):
@@ -247,35 +415,24 @@ class Board:
             form (row, col), representing the position the piece can jump to.
         """
         valid_jumps = []
+        board = self.board
 
-        # check all eight directions for valid jumps
-        for drow in [-1, 0, 1]:
-            for dcol in [-1, 0, 1]:
-                if drow == 0 and dcol == 0:
-                    continue  # skip current position
+        # check all eight directions for valid jumps, using the precomputed
+        # (over, landing) pairs of the starting square
+        for (next_row, next_col), (jump_row, jump_col) in JUMPS[row][col]:
 
-                # check square in current direction
-                next_row = row + drow
-                next_col = col + dcol
+            # check if there is a piece adjacent to the starting position, the square on
+            # the other side is empty and the square has not already been visited
+            if (board[next_row][next_col] != 0 and board[jump_row][jump_col] == 0 and
+                    (jump_row, jump_col) not in visited):
 
-                # check if there is an opponent's piece adjacent to the starting position
-                if self.is_valid_square(next_row, next_col, piece.color) and self.board[next_row][next_col] != 0:
+                # add the valid jump to the list and mark the square as visited
+                valid_jumps.append((jump_row, jump_col))
+                visited.append((jump_row, jump_col))
 
-                    # check square on the other side of the opponent's piece
-                    jump_row = next_row + drow
-                    jump_col = next_col + dcol
-
-                    # check if the jump is valid and the square has not already been visited
-                    if (self.is_valid_square(jump_row, jump_col, piece.color) and
-                            self.board[jump_row][jump_col] == 0 and (jump_row, jump_col) not in visited):
-
-                        # add the valid jump to the list and mark the square as visited
-                        valid_jumps.append((jump_row, jump_col))
-                        visited.append((jump_row, jump_col))
-
-                        # recursively check for more valid jumps from the new position
-                        jumps = self.check_jumps(piece, jump_row, jump_col, visited)
-                        valid_jumps += jumps
+                # recursively check for more valid jumps from the new position
+                jumps = self.check_jumps(piece, jump_row, jump_col, visited)
+                valid_jumps += jumps
 
         return valid_jumps
 
@@ -289,53 +446,62 @@ class Board:
             2. Number of pieces in the opponent's starting zone.
             3. Penalty for pieces still in their starting zone.
 
+        The factors are weighted by halma.weights.EVAL_WEIGHTS, which are loaded at
+        startup and can be fitted from game data with tune.py.
+
         A positive score indicates an advantage for the white player,
         while a negative score indicates an advantage for the black player.
 
         Returns:
             A floating-point number representing the evaluation score.
         """
-        # Distance between each player's pieces and the opposing starting zone
+        distance, proximity, start_penalty = self.features()
+
+        # Total evaluation with the loaded weights
+        evaluation = EVAL_WEIGHTS['distance'] * distance + (
+                       EVAL_WEIGHTS['proximity'] * proximity) - (
+                       EVAL_WEIGHTS['start_penalty'] * start_penalty)
+        return evaluation
+
+    def features(self):
+        """
+        Returns the unweighted evaluation factors, each as white's value minus black's.
+
+        Returns:
+            (int, int, int): The distance, proximity and start penalty differences.
+        """
         black_distance = 0
         white_distance = 0
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece != 0 and piece.color == BLACK:
-                    # Manhattan distance to white starting zone
-                    black_distance += abs(row - 0) + abs(col - 0)
-                elif piece != 0 and piece.color == WHITE:
-                    # Manhattan distance to black starting zone
-                    white_distance += abs(row - 7) + abs(col - 7)
-
-        # Number of pieces in the opponent's starting zone
         black_proximity = 0
         white_proximity = 0
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece(row, col)
-                if piece != 0 and piece.color == BLACK and (row, col) in WHITE_START:
-                    black_proximity += 1
-                elif piece != 0 and piece.color == WHITE and (row, col) in BLACK_START:
-                    white_proximity += 1
-
-        # Penalty for pieces still in their starting zone
         black_start_penalty = 0
         white_start_penalty = 0
-        for row, col in BLACK_START:
-            piece = self.get_piece(row, col)
-            if piece != 0 and piece.color == BLACK:
-                black_start_penalty += 1
-        for row, col in WHITE_START:
-            piece = self.get_piece(row, col)
-            if piece != 0 and piece.color == WHITE:
-                white_start_penalty += 1
-
-        # Total evaluation with modified weights
-        evaluation = 4 * (white_distance - black_distance) / 16.0 + (
-                       white_proximity - black_proximity) * 2.0 - (
-                       white_start_penalty - black_start_penalty) / 4.0
-        return evaluation
+        black_zone = ZONE_MASKS[BLACK]
+        white_zone = ZONE_MASKS[WHITE]
+
+        for row, pieces in enumerate(self.board):
+            bits = SQUARE_BITS[row]
+            for col, piece in enumerate(pieces):
+                if piece == 0:
+                    continue
+                if piece.color == BLACK:
+                    # Manhattan distance from black's corner, number of pieces in the
+                    # opponent's starting zone and pieces still in their starting zone
+                    black_distance += HOME_DISTANCE[BLACK][row][col]
+                    if white_zone & bits[col]:
+                        black_proximity += 1
+                    elif black_zone & bits[col]:
+                        black_start_penalty += 1
+                else:
+                    white_distance += HOME_DISTANCE[WHITE][row][col]
+                    if black_zone & bits[col]:
+                        white_proximity += 1
+                    elif white_zone & bits[col]:
+                        white_start_penalty += 1
+
+        return (white_distance - black_distance,
+                white_proximity - black_proximity,
+                white_start_penalty - black_start_penalty)
 
     def winner(self):
         """
@@ -345,15 +511,20 @@ class Board:
             None if there is no winner, "White wins" if all white pieces are in black's starting zone,
             or "Black wins" if all black pieces are in white's starting zone.
         """
-        # Get all the pieces for each player
-        white_pieces = self.get_all_pieces(WHITE)
-        black_pieces = self.get_all_pieces(BLACK)
-
-        # Check if all the white pieces are in black's starting zone
-        white_wins = all(piece.position() in BLACK_START for piece in white_pieces)
-
-        # Check if all the black pieces are in white's starting zone
-        black_wins = all(piece.position() in WHITE_START for piece in black_pieces)
+        # Check if all the white pieces are in black's starting zone and
+        # all the black pieces are in white's starting zone
+        white_wins = True
+        black_wins = True
+        for row, pieces in enumerate(self.board):
+            bits = SQUARE_BITS[row]
+            for col, piece in enumerate(pieces):
+                if piece == 0:
+                    continue
+                if piece.color == WHITE:
+                    if not ZONE_MASKS[BLACK] & bits[col]:
+                        white_wins = False
+                elif not ZONE_MASKS[WHITE] & bits[col]:
+                    black_wins = False
 
         # Return the winner, if there is one
         if white_wins and not black_wins:
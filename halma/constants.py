@@ -5,6 +5,10 @@ WIDTH, HEIGHT = 800, 800
 ROWS, COLS = 8, 8
 SQUARE_SIZE = WIDTH//COLS
 
+# Draw rules: a position occurring this many times, or a game reaching this many moves (plies), is a draw
+MAX_REPETITIONS = 3
+MAX_MOVES = 400
+
 # Starting zones
 BLACK_START = [(0, 0), (0, 1), (0, 2), (0, 3), (1, 0), (1, 1), (1, 2), (2, 0), (2, 1), (3, 0)]
 WHITE_START = [(4, 7), (5, 6), (5, 7), (6, 5), (6, 6), (6, 7), (7, 4), (7, 5), (7, 6), (7, 7)]
@@ -10,18 +10,24 @@ class Game:
     for selecting and moving pieces on the board. It also determines the winner
     of the game and resets the game state.
     """
-    def __init__(self, win):
+    def __init__(self, win, max_repetitions=MAX_REPETITIONS, max_moves=MAX_MOVES):
         """
         Initialize the game.
 
         Parameters:
             win (pygame.Surface): The game window to draw on.
+            max_repetitions (int): The number of times a position may occur before the game
+                is drawn by repetition, or None to disable the rule.
+            max_moves (int): The number of moves after which the game is drawn, or None to
+                disable the rule.
 
         Returns:
             None
         """
         self._init()
         self.win = win
+        self.max_repetitions = max_repetitions
+        self.max_moves = max_moves
 
     def update(self):
         """
@@ -40,6 +46,7 @@ class Game:
         self.board = Board()
         self.turn = BLACK
         self.valid_moves = []
+        self.history = [self.board.key(self.turn)]
 
     def get_board(self):
         """
@@ -177,9 +184,26 @@ class Game:
         else:
             self.turn = BLACK
 
-    def winner(self):
+        # record the new position for repetition detection
+        self.history.append(self.board.key(self.turn))
+
+    def repetitions(self):
+        """
+        Returns the number of times the current position has occurred in the game.
         """
-        Determine the winner of the game
+        return self.history.count(self.history[-1])
+
+    def winner(self):
         """
-        return self.board.winner()
+        Determine the winner of the game, or whether it has been drawn
+        by repetition or by reaching the move limit.
+        """
+        winner = self.board.winner()
+        if winner is not None:
+            return winner
+        if self.max_repetitions is not None and self.repetitions() >= self.max_repetitions:
+            return "Draw by repetition"
+        if self.max_moves is not None and len(self.history) - 1 >= self.max_moves:
+            return "Draw by move limit"
+        return None
 
@@ -0,0 +1,122 @@
+import os
+import pickle
+from halma.constants import *
+
+# Tables for boards with more squares than this are cached on disk instead of being rebuilt
+CACHE_THRESHOLD = 32 * 32
+CACHE_DIR = os.environ.get('HALMA_CACHE') or os.path.join(os.path.expanduser('~'), '.cache', 'halma')
+
+# Part of the cache file name. Increase it whenever build_geometry changes, so that
+# tables cached by an older version are rebuilt instead of loaded.
+GEOMETRY_VERSION = 3
+
+# The eight directions in the order the move generator tries them
+OFFSETS = tuple((drow, dcol) for drow in (-1, 0, 1) for dcol in (-1, 0, 1) if drow or dcol)
+
+
+def build_geometry(rows, cols):
+    """
+    Build the geometry tables of a board.
+
+    Every per-square table is a tuple of rows of tuples, indexed as table[row][col].
+    The starting zones are the corner triangles of side min(rows, cols) // 2, which on
+    the standard 8x8 board are BLACK_START and WHITE_START.
+
+    Parameters:
+        rows (int): The number of rows of the board.
+        cols (int): The number of columns of the board.
+
+    Returns:
+        dict: The tables, with the keys:
+            directions: (adjacent, landing) per direction, landing being None when a jump
+                in that direction would leave the board
+            jumps: (over, landing) per direction in which a jump stays on the board
+            bits: the bit of each square in a zone mask
+            zones: {BLACK: mask, WHITE: mask} of the starting zones, black's in the top left
+                corner and white's in the bottom right
+            home_distance: {color: table} of Manhattan distances from the color's own corner
+            goal_distance: {color: table} of Manhattan distances to the color's goal corner
+    """
+    def on_board(row, col):
+        return 0 <= row < rows and 0 <= col < cols
+
+    def table(function):
+        return tuple(tuple(function(row, col) for col in range(cols)) for row in range(rows))
+
+    def directions(row, col):
+        result = []
+        for drow, dcol in OFFSETS:
+            if on_board(row + drow, col + dcol):
+                landing = (row + 2 * drow, col + 2 * dcol)
+                result.append(((row + drow, col + dcol), landing if on_board(*landing) else None))
+        return tuple(result)
+
+    direction_table = table(directions)
+    bits = table(lambda row, col: 1 << (row * cols + col))
+
+    last = (rows - 1) + (cols - 1)
+    black_home = table(lambda row, col: row + col)
+    white_home = table(lambda row, col: last - row - col)
+
+    def zone(home):
+        # The squares within the corner triangle around a color's own corner
+        zone_size = min(rows, cols) // 2
+        value = 0
+        for row in range(rows):
+            for col in range(cols):
+                if home[row][col] < zone_size:
+                    value |= bits[row][col]
+        return value
+
+    return {
+        'directions': direction_table,
+        'jumps': tuple(tuple(tuple(pair for pair in square if pair[1] is not None) for square in row)
+                       for row in direction_table),
+        'bits': bits,
+        'zones': {BLACK: zone(black_home), WHITE: zone(white_home)},
+        'home_distance': {BLACK: black_home, WHITE: white_home},
+        'goal_distance': {BLACK: white_home, WHITE: black_home},
+    }
+
+
+def load_geometry(rows=ROWS, cols=COLS):
+    """
+    Returns the geometry tables of a board, reading them from the disk cache for large boards.
+
+    Parameters:
+        rows (int): The number of rows of the board.
+        cols (int): The number of columns of the board.
+
+    Returns:
+        dict: The tables, as returned by build_geometry.
+    """
+    if rows * cols <= CACHE_THRESHOLD:
+        return build_geometry(rows, cols)
+
+    path = os.path.join(CACHE_DIR, f"geometry-v{GEOMETRY_VERSION}-{rows}x{cols}.pickle")
+    try:
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+
+    geometry = build_geometry(rows, cols)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Write to a temporary file first so other processes never read a partial cache
+        temporary = f"{path}.{os.getpid()}"
+        with open(temporary, 'wb') as file:
+            pickle.dump(geometry, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except OSError:
+        pass
+    return geometry
+
+
+_geometry = load_geometry()
+DIRECTIONS = _geometry['directions']
+JUMPS = _geometry['jumps']
+SQUARE_BITS = _geometry['bits']
+ZONE_MASKS = _geometry['zones']
+HOME_DISTANCE = _geometry['home_distance']
+GOAL_DISTANCE = _geometry['goal_distance']
@@ -0,0 +1,73 @@
+from halma.constants import *
+
+FILES = 'abcdefgh'
+
+
+def square_name(row, col):
+    """
+    Returns the name of a square, e.g. (0, 0) -> "a1" and (7, 7) -> "h8".
+
+    Parameters:
+        row (int): The row index of the square.
+        col (int): The column index of the square.
+
+    Returns:
+        str: The column letter followed by the 1-based row number.
+    """
+    return f"{FILES[col]}{row + 1}"
+
+
+def parse_square(text):
+    """
+    Parses a square name produced by square_name.
+
+    Parameters:
+        text (str): The square name.
+
+    Returns:
+        tuple: The (row, col) of the square.
+
+    Raises:
+        ValueError: If the text is not a square on the board.
+    """
+    if len(text) < 2 or text[0] not in FILES or not text[1:].isdigit():
+        raise ValueError(f"invalid square: {text!r}")
+    row, col = int(text[1:]) - 1, FILES.index(text[0])
+    if not (0 <= row < ROWS and 0 <= col < COLS):
+        raise ValueError(f"invalid square: {text!r}")
+    return row, col
+
+
+def format_move(move):
+    """
+    Returns the text form of a move, e.g. ((0, 3), (2, 5)) -> "d1-f3".
+
+    Parameters:
+        move (tuple): The ((row, col), (row, col)) source and destination squares.
+
+    Returns:
+        str: The move in text form, or "(none)" if move is None.
+    """
+    if move is None:
+        return "(none)"
+    (from_row, from_col), (to_row, to_col) = move
+    return f"{square_name(from_row, from_col)}-{square_name(to_row, to_col)}"
+
+
+def parse_move(text):
+    """
+    Parses a move produced by format_move.
+
+    Parameters:
+        text (str): The move in text form.
+
+    Returns:
+        tuple: The ((row, col), (row, col)) source and destination squares.
+
+    Raises:
+        ValueError: If the text is not a valid move.
+    """
+    source, _, destination = text.partition('-')
+    if not destination:
+        raise ValueError(f"invalid move: {text!r}")
+    return parse_square(source), parse_square(destination)
@@ -0,0 +1,75 @@
+from halma.constants import *
+
+# The symmetries of the Halma layout. Each one maps a square onto another square and
+# either keeps the piece colors or swaps black and white (which also swaps the side
+# to move and negates the evaluation score). Every symmetry is its own inverse.
+IDENTITY = 0
+TRANSPOSE = 1           # (r, c) -> (c, r)
+ROTATE = 2              # (r, c) -> (7 - r, 7 - c), colors swapped
+ROTATE_TRANSPOSE = 3    # (r, c) -> (7 - c, 7 - r), colors swapped
+
+SYMMETRIES = (IDENTITY, TRANSPOSE, ROTATE, ROTATE_TRANSPOSE)
+
+
+def swaps_colors(symmetry):
+    """
+    Returns True if the symmetry swaps black and white.
+
+    Parameters:
+        symmetry (int): One of SYMMETRIES.
+
+    Returns:
+        bool: True for ROTATE and ROTATE_TRANSPOSE.
+    """
+    return symmetry >= ROTATE
+
+
+def transform_square(symmetry, row, col):
+    """
+    Map a square onto its image under a symmetry.
+
+    Parameters:
+        symmetry (int): One of SYMMETRIES.
+        row (int): The row of the square.
+        col (int): The column of the square.
+
+    Returns:
+        tuple: The (row, col) of the image square.
+    """
+    if symmetry == TRANSPOSE:
+        return col, row
+    if symmetry == ROTATE:
+        return ROWS - 1 - row, COLS - 1 - col
+    if symmetry == ROTATE_TRANSPOSE:
+        return ROWS - 1 - col, COLS - 1 - row
+    return row, col
+
+
+def transform_move(symmetry, move):
+    """
+    Map a move onto its image under a symmetry.
+
+    Parameters:
+        symmetry (int): One of SYMMETRIES.
+        move (tuple): The ((row, col), (row, col)) move, or None.
+
+    Returns:
+        tuple: The image of the move, or None if move is None.
+    """
+    if move is None or symmetry == IDENTITY:
+        return move
+    (from_row, from_col), (to_row, to_col) = move
+    return transform_square(symmetry, from_row, from_col), transform_square(symmetry, to_row, to_col)
+
+
+def opposite(color):
+    """
+    Returns the other player's color.
+
+    Parameters:
+        color (tuple): BLACK or WHITE.
+
+    Returns:
+        tuple: WHITE for BLACK and BLACK for WHITE.
+    """
+    return WHITE if color == BLACK else BLACK
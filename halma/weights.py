@@ -0,0 +1,58 @@
+import json
+import os
+
+# The hand-picked weights of the three evaluation factors (see Board.evaluate)
+DEFAULT_WEIGHTS = {
+    'distance': 4 / 16,
+    'proximity': 2.0,
+    'start_penalty': 1 / 4,
+}
+
+# Weights are loaded from this file at startup if it exists, unless the
+# HALMA_WEIGHTS environment variable names another file
+WEIGHTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'weights.json')
+
+
+def load_weights(path=None):
+    """
+    Load evaluation weights from a JSON file.
+
+    Parameters:
+        path (str): The file to read. Defaults to $HALMA_WEIGHTS, or weights.json
+            in the repository root.
+
+    Returns:
+        dict: The weights of each evaluation factor. Factors missing from the file,
+        or all of them if the file does not exist, keep their default weights.
+
+    Raises:
+        ValueError: If the file names an unknown factor.
+    """
+    path = path or os.environ.get('HALMA_WEIGHTS') or WEIGHTS_FILE
+    weights = dict(DEFAULT_WEIGHTS)
+    if not os.path.exists(path):
+        return weights
+
+    with open(path) as file:
+        loaded = json.load(file)
+    unknown = set(loaded) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError(f"unknown evaluation weights in {path}: {', '.join(sorted(unknown))}")
+    weights.update({name: float(value) for name, value in loaded.items()})
+    return weights
+
+
+def save_weights(weights, path=WEIGHTS_FILE):
+    """
+    Write evaluation weights to a JSON file that load_weights can read.
+
+    Parameters:
+        weights (dict): The weight of each evaluation factor.
+        path (str): The file to write.
+    """
+    with open(path, 'w') as file:
+        json.dump(weights, file, indent=4)
+        file.write('\n')
+
+
+EVAL_WEIGHTS = load_weights()
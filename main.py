@@ -2,6 +2,7 @@ import pygame
 from halma.constants import *
 from halma.game import Game
 from minimax.algorithm import minimax
+from minimax.context import SearchContext
 
 FPS = 60
 
@@ -34,13 +35,15 @@ def main():
     run = True
     clock = pygame.time.Clock()
     game = Game(WIN)
+    context = SearchContext()
 
     while run:
         clock.tick(FPS)
 
-        # AI makes a move
-        if game.turn == WHITE:
-            value, new_board = minimax(game.get_board(), 2, float('-inf'), float('inf'), WHITE, game)
+        # AI makes a move, avoiding positions that already occurred in the game
+        if game.turn == WHITE and game.winner() is None:
+            context.start(history=game.history[:-1])
+            value, new_board = minimax(game.get_board(), 2, float('-inf'), float('inf'), True, game, context)
             game.ai_move(new_board)
 
         # Check for a winner
@@ -1,11 +1,15 @@
 from copy import deepcopy
-import pygame.draw
+from itertools import chain
+from halma.board import WHITE_TO_MOVE, ZOBRIST_KEYS
+from halma.geometry import GOAL_DISTANCE
+from halma.weights import EVAL_WEIGHTS
+from minimax.context import EXACT, LOWER, UPPER, position_key
 
 BLACK = (0, 0, 0)  # user piece color
 WHITE = (255, 255, 255)  # AI piece color
 
 
-def minimax(board, depth, alpha, beta, max_player, game):
+def minimax(board, depth, alpha, beta, max_player, game, context=None):
     """
     This function uses the minimax algorithm with alpha-beta pruning
     to search for the best move for the current player.
@@ -17,24 +21,96 @@ def minimax(board, depth, alpha, beta, max_player, game):
         beta (int): The current beta value for alpha-beta pruning.
         max_player (bool): True if the current player is the maximizing player, False otherwise.
         game (Game): The current game instance.
+        context (SearchContext): Optional shared search state. When given, results are
+            cached in its transposition table, its limits are enforced and the search
+            is recorded by its tracer, if any.
 
     Returns:
         (int, Board): A tuple containing the evaluation score and the board state of the best move found.
+        Below the root, the board may be None when the score comes from the transposition table.
 
+    Raises:
+        SearchAborted: If a limit of the search context has been reached.
     """
+    # The keys below compare max_player with booleans, so a truthy color must not reach them
+    max_player = bool(max_player)
+    tracer = context.tracer if context is not None else None
+    if context is not None:
+        # Count the node and stop if the search has run out of time or nodes
+        context.check()
+        ply = len(context.path)
+
+        # A position that repeats an earlier one only cycles, so score it as a draw
+        path_key = position_key(board, max_player)
+        if ply and context.is_repetition(path_key):
+            if tracer is not None:
+                tracer.leaf(ply, board.last_move, context.draw_score, "repeat")
+            return context.draw_score, None
 
     # Check if the maximum search depth has been reached or if a winner has been found
     if depth == 0 or board.winner() is not None:
-        return board.evaluate(), board
+        value = board.evaluate()
+        if tracer is not None:
+            tracer.leaf(ply, board.last_move if ply else None, value, "eval")
+        return value, board
+
+    first_move = None
+    traced = False
+    if context is not None:
+        # Reuse a stored result if it was searched deep enough and fits the window.
+        # The root always searches so that it can return a board.
+        key = context.key(board, max_player)
+        entry = context.probe(key)
+        if entry is not None and context.path and entry[0] >= depth:
+            value, flag = entry[1], entry[2]
+            if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                if tracer is not None:
+                    tracer.leaf(ply, board.last_move, value, "table")
+                return value, None
+        if entry is not None:
+            # Try the best move from an earlier search of this position first
+            first_move = entry[3]
+        if tracer is not None:
+            traced = tracer.enter(ply, board.last_move if ply else None, depth, alpha, beta)
+        context.path.append(path_key)
+    alpha_orig, beta_orig = alpha, beta
+
+    # At frontier nodes, moves that do not advance can change the evaluation by at most
+    # the futility margin. If that cannot reach the window, only generate advancing moves
+    # and let the bound stand in for the pruned ones. A pruned move that repeats a position
+    # scores the draw score instead, so those are still searched when the draw beats the bound.
+    futility_bound = None
+    min_progress = None
+    repeats = ()
+    if context is not None and context.futility and depth == 1:
+        margin = context.futility_margin
+        if margin is None:
+            margin = EVAL_WEIGHTS['proximity'] + EVAL_WEIGHTS['start_penalty']
+        static = board.evaluate()
+        if max_player and static + margin <= alpha:
+            futility_bound, min_progress = static + margin, 1
+        elif not max_player and static - margin >= beta:
+            futility_bound, min_progress = static - margin, 1
+        if futility_bound is not None and (context.draw_score > futility_bound if max_player
+                                           else context.draw_score < futility_bound):
+            repeats = repeating_moves(board, WHITE if max_player else BLACK, game, context)
+
+    moves = get_all_moves(board, WHITE if max_player else BLACK, game, first_move, min_progress)
+    if repeats:
+        moves = chain(moves, repeats)
+    root_excluded = context is not None and len(context.path) == 1 and context.excluded
+    if root_excluded:
+        # Leave out root moves that have already been reported by a multi-PV search
+        moves = (move for move in moves if move.last_move not in context.excluded)
 
     if max_player:
         # Max player is trying to maximize the evaluation score
-        max_evaluation = float("-inf")
+        max_evaluation = futility_bound if futility_bound is not None else float("-inf")
         best_move = None
         # Loop through all valid moves for the current player and evaluate each one
-        for move in get_all_moves(board, WHITE, game):
+        for index, move in enumerate(moves):
             # Evaluate the current move using the minimax function with alpha-beta pruning
-            evaluation = minimax(move, depth-1, alpha, beta, False, game)[0]
+            evaluation = search_move(move, index, depth, alpha, beta, True, game, context)
             # Update the maximum evaluation score and best move if a better move is found
             if evaluation > max_evaluation:
                 max_evaluation = evaluation
@@ -43,16 +119,18 @@ def minimax(board, depth, alpha, beta, max_player, game):
             alpha = max(alpha, evaluation)
             # If beta is less than or equal to alpha, break out of the loop
             if beta <= alpha:
+                if traced:
+                    tracer.cutoff(ply, move.last_move, evaluation)
                 break
-        return max_evaluation, best_move
+        result = max_evaluation, best_move
     else:
         # Min player is trying to minimize the evaluation score
-        min_evaluation = float("inf")
+        min_evaluation = futility_bound if futility_bound is not None else float("inf")
         best_move = None
         # Loop through all valid moves for the current player and evaluate each one
-        for move in get_all_moves(board, BLACK, game):
+        for index, move in enumerate(moves):
             # Evaluate the current move using the minimax function with alpha-beta pruning
-            evaluation = minimax(move, depth - 1, alpha, beta, True, game)[0]
+            evaluation = search_move(move, index, depth, alpha, beta, False, game, context)
             # Update the minimum evaluation score and best move if a better move is found
             if evaluation < min_evaluation:
                 min_evaluation = evaluation
@@ -61,91 +139,209 @@ def minimax(board, depth, alpha, beta, max_player, game):
             beta = min(beta, evaluation)
             # If beta is less than or equal to alpha, break out of the loop
             if beta <= alpha:
+                if traced:
+                    tracer.cutoff(ply, move.last_move, evaluation)
                 break
-        return min_evaluation, best_move
+        result = min_evaluation, best_move
+
+    if context is not None:
+        # Store the result along with how it relates to the original window
+        context.path.pop()
+        value = result[0]
+        if value <= alpha_orig:
+            flag = UPPER
+        elif value >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        move = best_move.last_move if best_move is not None else None
+        # A root searched without some of its moves does not have a true score
+        if not root_excluded:
+            context.store(key, depth, value, flag, move)
+        if traced:
+            tracer.exit(ply, value, move)
+
+    return result
+
+
+def search_move(move, index, depth, alpha, beta, max_player, game, context):
+    """
+    Search the board after one move of a node, with late move reductions if enabled.
+
+    A move that comes late in the move order and does not advance its piece is first
+    searched with a reduced depth. It is searched again at full depth only if the reduced
+    search suggests it could improve on the best move found so far.
+
+    Parameters:
+        move (Board): The board after the move.
+        index (int): The position of the move in the move order, starting at 0.
+        depth (int): The depth of the parent node.
+        alpha (int): The parent's alpha value.
+        beta (int): The parent's beta value.
+        max_player (bool): True if the parent is the maximizing player.
+        game (Game): The current game instance.
+        context (SearchContext): Optional shared search state.
+
+    Returns:
+        float: The evaluation score of the move.
+    """
+    if (context is not None and context.lmr and depth >= context.lmr_min_depth
+            and index >= context.lmr_min_moves
+            and progress(move.last_move, WHITE if max_player else BLACK) <= 0):
+        reduced_depth = max(depth - 1 - context.lmr_reduction, 0)
+        evaluation = minimax(move, reduced_depth, alpha, beta, not max_player, game, context)[0]
+        # Keep the reduced result unless the move looks better than the current best
+        if (max_player and evaluation <= alpha) or (not max_player and evaluation >= beta):
+            return evaluation
+
+    return minimax(move, depth - 1, alpha, beta, not max_player, game, context)[0]
 
 
-def get_all_moves(board, color, game):
+def progress(move, color):
     """
-    Returns all possible moves for a given color on the current board.
+    Returns how far a move takes a piece towards its goal corner.
+
+    Parameters:
+        move (tuple): The ((row, col), (row, col)) move.
+        color (tuple): The color of the piece being moved.
+
+    Returns:
+        int: The decrease in the Manhattan distance to the goal corner, negative for
+        backward moves and 0 for sideways moves.
+    """
+    (from_row, from_col), (to_row, to_col) = move
+    distance = GOAL_DISTANCE[color]
+    return distance[from_row][from_col] - distance[to_row][to_col]
+
+
+def get_all_moves(board, color, game, first_move=None, min_progress=None):
+    """
+    Generates all possible moves for a given color on the current board.
+
+    Moves are produced lazily in stages, most promising first. Each stage is only
+    generated once the previous one is used up, so a search which cuts off early
+    neither generates nor copies the boards of the moves it does not look at:
+        1. first_move, usually the best move stored in the transposition table
+        2. jumps that move the piece towards its goal corner, longest first
+        3. steps that move the piece towards its goal corner
+        4. sideways and backward moves, least harmful first
 
     Parameters:
         board (Board): current game board
         color (string): color of the pieces to move (either RED or WHITE)
         game (Game): current game object
+        first_move (tuple): an optional ((row, col), (row, col)) move to try first
+        min_progress (int): if given, only moves with at least this much progress (see progress) are generated
 
-    Returns:
-        list: a list of Board objects representing all possible board
-        configurations after a move by the given color
+    Yields:
+        Board: the board configuration after each move by the given color
     """
-    moves = []
+    # stage 1: the suggested move, if it is legal for this color
+    if first_move is not None and min_progress is not None and progress(first_move, color) < min_progress:
+        first_move = None
+    if first_move is not None:
+        piece = board.get_piece(*first_move[0])
+        if piece != 0 and piece.color == color and first_move[1] in board.get_valid_moves(piece):
+            yield make_move(board, piece, first_move[1], game)
+        else:
+            first_move = None
 
-    # iterate through all pieces of the given color on the board
-    for piece in board.get_all_pieces(color):
-        # get all valid moves for the current piece
-        valid_moves = board.get_valid_moves(piece)
-        # iterate through all valid moves for the current piece
-        for move in valid_moves:
+    def candidates(moves):
+        # (progress, piece, move) for the moves of every piece that pass the filters
+        for piece in board.get_all_pieces(color):
+            for move in moves(piece):
+                if first_move is not None and (piece.position(), move) == first_move:
+                    continue
+                gain = progress((piece.position(), move), color)
+                if min_progress is None or gain >= min_progress:
+                    yield gain, piece, move
+
+    # stage 2: a square reachable by several chains of jumps is listed once, and a chain
+    # that ends next to its starting square is left to stage 3, where it is a step
+    others = []
+    jumps = list(dict.fromkeys(item for item in candidates(board.get_jumps)
+                               if max(abs(item[2][0] - item[1].row), abs(item[2][1] - item[1].col)) > 1))
+    forward = sorted((item for item in jumps if item[0] > 0), key=lambda item: item[0], reverse=True)
+    others += [item for item in jumps if item[0] <= 0]
+    for _, piece, move in forward:
+        yield make_move(board, piece, move, game)
+
+    # stage 3: the backward and sideways moves of stages 2 and 3 are kept for stage 4
+    steps = list(candidates(board.get_steps))
+    forward = sorted((item for item in steps if item[0] > 0), key=lambda item: item[0], reverse=True)
+    others += [item for item in steps if item[0] <= 0]
+    for _, piece, move in forward:
+        yield make_move(board, piece, move, game)
 
-            # visualize AI decision-making by drawing considered moves (optional)
-            # visualize(game, board, piece)
+    # stage 4
+    others.sort(key=lambda item: item[0], reverse=True)
+    for _, piece, move in others:
+        yield make_move(board, piece, move, game)
 
-            # create a copy of the board and the piece to simulate the move
-            temp_board = deepcopy(board)
-            temp_piece = temp_board.get_piece(piece.row, piece.col)
 
-            # simulate the move on the temporary board
-            new_board = simulate_move(temp_piece, move, temp_board, game)
+def repeating_moves(board, color, game, context):
+    """
+    Returns the moves that do not advance and lead to a repeated position.
 
-            # add the resulting board configuration to the list of moves
-            moves.append(new_board)
+    Parameters:
+        board (Board): current game board
+        color (tuple): color of the pieces to move
+        game (Game): current game object
+        context (SearchContext): the search state holding the path and the game history
 
-    return moves
+    Returns:
+        list: the board configuration after each such move
+    """
+    keys = ZOBRIST_KEYS[color]
+    # The position after the move has the other side to move
+    turn_key = WHITE_TO_MOVE if color != WHITE else 0
+    boards = []
+    for piece in board.get_all_pieces(color):
+        for move in dict.fromkeys(board.get_valid_moves(piece)):
+            if progress((piece.position(), move), color) > 0:
+                continue
+            key = board.hash ^ keys[piece.row][piece.col] ^ keys[move[0]][move[1]] ^ turn_key
+            if context.is_repetition(key):
+                boards.append(make_move(board, piece, move, game))
+    return boards
 
 
-def simulate_move(piece, move, board, game):
+def make_move(board, piece, move, game):
     """
-    Simulates a given move on a copy of the current board.
+    Returns a copy of the board with the given move played on it.
 
-    Args:
+    Parameters:
+        board (Board): current game board
         piece (Piece): piece to move
         move (tuple): new position of the piece (row, col)
-        board (Board): current game board
         game (Game): current game object
 
     Returns:
         Board: a new board configuration after the given move has been made
     """
-    # move the piece to the new position on the board
-    board.move(piece, move[0], move[1])
+    # create a copy of the board and the piece to simulate the move
+    temp_board = deepcopy(board)
+    temp_piece = temp_board.get_piece(piece.row, piece.col)
 
-    return board
+    # simulate the move on the temporary board
+    return simulate_move(temp_piece, move, temp_board, game)
 
 
-def visualize(game, board, piece):
+def simulate_move(piece, move, board, game):
     """
-    Visualizes the minimax algorithm by drawing the current board state and highlighting the valid moves for a piece.
+    Simulates a given move on a copy of the current board.
 
-    Parameters:
-        game (Game): the current Game object.
-        board (Board): the current Board object.
-        piece (Piece): the Piece object to visualize.
+    Args:
+        piece (Piece): piece to move
+        move (tuple): new position of the piece (row, col)
+        board (Board): current game board
+        game (Game): current game object
 
     Returns:
-        None
+        Board: a new board configuration after the given move has been made
     """
-    # Get valid moves for the piece
-    valid_moves = board.get_valid_moves(piece)
-
-    # Draw the board and highlight the selected piece
-    board.draw(game.win)
-    pygame.draw.circle(game.win, (93, 187, 99), (piece.x, piece.y), 47, 10)
-
-    # Draw circles on valid move squares
-    game.draw_valid_moves(valid_moves)
+    # move the piece to the new position on the board
+    board.move(piece, move[0], move[1])
 
-    # Update the display
-    pygame.display.update()
+    return board
 
-    # Wait for a short delay (optional)
-    # pygame.time.delay(100)
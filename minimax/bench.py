@@ -0,0 +1,181 @@
+"""
+Benchmark the selective search features.
+
+Run it with "python -m minimax.bench [--depth N] [--games N]". For each configuration of
+late move reductions and futility pruning it reports:
+
+    - the nodes and time needed to complete each depth of an iterative deepening search
+      from a few test positions, and
+    - the result of self-play games at a fixed depth against the full-width search.
+
+The search is deterministic, so every pair of self-play games starts from its own
+random opening, played once with each configuration on each side.
+"""
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import random
+import time
+from halma.board import Board
+from halma.game import Game
+from halma.symmetry import opposite
+from minimax.algorithm import BLACK, WHITE, get_all_moves
+from minimax.context import SearchContext
+from minimax.search import search
+
+# Search configurations to compare, as SearchContext keyword arguments
+CONFIGURATIONS = {
+    'full width': {'lmr': False, 'futility': False},
+    'futility': {'lmr': False, 'futility': True},
+    'lmr': {'lmr': True, 'futility': False},
+    'lmr + futility': {'lmr': True, 'futility': True},
+}
+
+# Test positions: the start, an opening and a crowded middlegame
+POSITIONS = [
+    ("bbbb4/bbb5/bb6/b7/7w/6ww/5www/4wwww", BLACK),
+    ("b2b4/b1b5/bb1bb3/b7/3ww2w/4wbww/5w2/4ww1w", BLACK),
+    ("8/w3bw2/1bwbbb2/ww6/1w1w1wb1/2b2bb1/6b1/4w2w", BLACK),
+]
+
+
+def nodes_to_depth(options, depth):
+    """
+    Measure the cost of reaching each depth from the test positions.
+
+    Parameters:
+        options (dict): SearchContext keyword arguments.
+        depth (int): The deepest depth to search.
+
+    Returns:
+        list: The total (nodes, seconds) over all positions for each depth from 1 to depth.
+    """
+    totals = [[0, 0.0] for _ in range(depth)]
+    for layout, color in POSITIONS:
+        context = SearchContext(**options)
+        start = time.monotonic()
+
+        def record(info):
+            totals[info['depth'] - 1][0] += info['nodes']
+            totals[info['depth'] - 1][1] += time.monotonic() - start
+
+        search(Board.from_string(layout), color, depth, context=context, on_info=record)
+    return [tuple(total) for total in totals]
+
+
+def random_opening(plies, rng):
+    """
+    Pick random moves from the starting position.
+
+    Parameters:
+        plies (int): The number of moves to pick.
+        rng (random.Random): The random number generator to use.
+
+    Returns:
+        list: The ((row, col), (row, col)) moves, black first.
+    """
+    board, color, moves = Board(), BLACK, []
+    for _ in range(plies):
+        board = rng.choice(list(get_all_moves(board, color, None)))
+        moves.append(board.last_move)
+        color = opposite(color)
+    return moves
+
+
+def play_game(white_options, black_options, depth, opening=()):
+    """
+    Play a game between two search configurations.
+
+    Parameters:
+        white_options (dict): SearchContext keyword arguments for white.
+        black_options (dict): SearchContext keyword arguments for black.
+        depth (int): The search depth of both players.
+        opening (iterable): Moves to play from the starting position before the players take over.
+
+    Returns:
+        str: The result, as returned by Game.winner, or "No result" if a player has no moves.
+    """
+    game = Game(None)
+    for move in opening:
+        game.board.play(move, game.turn)
+        game.change_turn()
+    contexts = {WHITE: SearchContext(**white_options), BLACK: SearchContext(**black_options)}
+    while game.winner() is None:
+        move, _ = search(game.board, game.turn, depth, context=contexts[game.turn], history=game.history[:-1])
+        if move is None:
+            return "No result"
+        game.board.play(move, game.turn)
+        game.change_turn()
+    return game.winner()
+
+
+def self_play(options, depth, games, opening_plies=6, seed=0):
+    """
+    Play a configuration against the full-width search, alternating colors.
+
+    Parameters:
+        options (dict): SearchContext keyword arguments of the tested configuration.
+        depth (int): The search depth of both players.
+        games (int): The number of games to play.
+        opening_plies (int): The length of the random opening of each pair of games.
+        seed (int): The seed of the random openings, so every configuration gets the same ones.
+
+    Returns:
+        (int, int, int): The wins, draws and losses of the tested configuration.
+    """
+    baseline = CONFIGURATIONS['full width']
+    rng = random.Random(seed)
+    wins = draws = losses = 0
+    for number in range(games):
+        tested_color = WHITE if number % 2 == 0 else BLACK
+        if tested_color == WHITE:
+            opening = random_opening(opening_plies, rng)
+            result = play_game(options, baseline, depth, opening)
+        else:
+            result = play_game(baseline, options, depth, opening)
+
+        if result == "White wins":
+            winner = WHITE
+        elif result == "Black wins":
+            winner = BLACK
+        else:
+            winner = None
+
+        if winner is None:
+            draws += 1
+        elif winner == tested_color:
+            wins += 1
+        else:
+            losses += 1
+    return wins, draws, losses
+
+
+def main():
+    """
+    Parse the command line arguments and run the benchmarks.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark late move reductions and futility pruning.")
+    parser.add_argument('--depth', type=int, default=4, help="deepest depth for the nodes-to-depth benchmark")
+    parser.add_argument('--games', type=int, default=4, help="self-play games per configuration, played in pairs")
+    parser.add_argument('--game-depth', type=int, default=SearchContext().lmr_min_depth,
+                        help="search depth in self-play games (at least lmr_min_depth, or LMR never applies)")
+    parser.add_argument('--opening-plies', type=int, default=6, help="random moves at the start of each pair of games")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the random openings")
+    args = parser.parse_args()
+
+    print("nodes (seconds) to complete each depth")
+    for name, options in CONFIGURATIONS.items():
+        totals = nodes_to_depth(options, args.depth)
+        print(f"{name:>16}: " + "  ".join(f"{nodes} ({seconds:.1f}s)" for nodes, seconds in totals))
+
+    if args.games:
+        print(f"self-play against full width at depth {args.game_depth} (wins/draws/losses)")
+        for name, options in CONFIGURATIONS.items():
+            if name != 'full width':
+                wins, draws, losses = self_play(options, args.game_depth, args.games, args.opening_plies, args.seed)
+                print(f"{name:>16}: {wins}/{draws}/{losses}")
+
+
+if __name__ == '__main__':
+    main()
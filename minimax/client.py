@@ -0,0 +1,275 @@
+"""
+A client library for driving "python -m minimax.engine" worker processes.
+
+Example:
+
+    with EnginePool(4) as pool:
+        for job, result in pool.analyse(jobs):
+            if isinstance(result, Exception):
+                continue
+            print(job['layout'], result['bestmove'], result['score'])
+"""
+import os
+import queue
+import subprocess
+import sys
+import threading
+
+# The repository root, so the workers can import the halma and minimax packages
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class EngineClient:
+    """
+    Drives a single engine process over its stdin/stdout line protocol.
+
+    Attributes:
+        process (subprocess.Popen): The engine process.
+    """
+    def __init__(self):
+        env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT='1')
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'minimax.engine'],
+            cwd=ROOT,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1
+        )
+
+    def send(self, line):
+        """
+        Send a command to the engine.
+
+        Parameters:
+            line (str): The command to send.
+        """
+        self.process.stdin.write(line + '\n')
+        self.process.stdin.flush()
+
+    def read_line(self):
+        """
+        Read the next line of engine output.
+
+        Returns:
+            str: The line without its trailing newline.
+
+        Raises:
+            EOFError: If the engine has exited.
+        """
+        line = self.process.stdout.readline()
+        if not line:
+            raise EOFError("engine process exited")
+        return line.rstrip('\n')
+
+    def isready(self):
+        """
+        Wait until the engine has processed every command sent so far.
+
+        Returns:
+            list: The messages of any "info string" lines reported in the meantime.
+        """
+        self.send('isready')
+        messages = []
+        while True:
+            line = self.read_line()
+            if line == 'readyok':
+                return messages
+            if line.startswith('info string '):
+                messages.append(line[len('info string '):])
+
+    def new_game(self):
+        """
+        Clear the engine's transposition table.
+        """
+        self.send('newgame')
+
+    def set_position(self, layout=None, color='b', moves=()):
+        """
+        Set the position to search.
+
+        Parameters:
+            layout (str): A position string from Board.to_string, or None for the starting position.
+            color (str): 'w' or 'b', the side to move in the layout. Ignored for the starting position.
+            moves (iterable): Moves in text form to play from the position.
+
+        Raises:
+            ValueError: If the engine rejects the position or one of the moves.
+        """
+        command = 'position startpos' if layout is None else f'position layout {layout} {color}'
+        if moves:
+            command += ' moves ' + ' '.join(moves)
+        self.send(command)
+
+        for message in self.isready():
+            if message.startswith('error: '):
+                raise ValueError(message[len('error: '):])
+
+    def go(self, depth=None, movetime=None, nodes=None):
+        """
+        Search the current position and wait for the result.
+
+        Parameters:
+            depth (int): The maximum search depth, or None.
+            movetime (int): The time limit in milliseconds, or None.
+            nodes (int): The node limit, or None.
+
+        Returns:
+            dict: The "bestmove" in text form (None if there is no move), plus the "depth",
+            "score", "nodes" and "pv" of the last info line (None if no iteration completed)
+            and "mate", the number of moves to a proven forced win, negative if the opponent
+            wins (None if none was found).
+        """
+        command = 'go'
+        for name, value in (('depth', depth), ('movetime', movetime), ('nodes', nodes)):
+            if value is not None:
+                command += f' {name} {value}'
+        self.send(command)
+
+        result = {'depth': None, 'score': None, 'nodes': None, 'pv': [], 'mate': None}
+        while True:
+            tokens = self.read_line().split()
+            if not tokens or tokens[:2] == ['info', 'string']:
+                continue
+            if tokens[0] == 'bestmove':
+                result['bestmove'] = tokens[1] if tokens[1] != '(none)' else None
+                return result
+            if tokens[0] == 'info':
+                pv_index = tokens.index('pv')
+                fields = dict(zip(tokens[1:pv_index:2], tokens[2:pv_index:2]))
+                result['depth'] = int(fields['depth'])
+                result['score'] = float(fields['score'])
+                result['nodes'] = int(fields['nodes'])
+                result['pv'] = tokens[pv_index + 1:]
+                result['mate'] = int(fields['mate']) if 'mate' in fields else None
+
+    def analyse(self, layout=None, color='b', moves=(), depth=None, movetime=None, nodes=None):
+        """
+        Set a position and search it.
+
+        Returns:
+            dict: The search result, as returned by go.
+        """
+        self.set_position(layout, color, moves)
+        return self.go(depth, movetime, nodes)
+
+    def close(self):
+        """
+        Ask the engine to quit and wait for the process to exit.
+        """
+        if self.process.poll() is None:
+            try:
+                self.send('quit')
+                self.process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EnginePool:
+    """
+    A pool of engine processes that analyse positions in parallel.
+
+    Each worker keeps its process, and therefore its transposition table,
+    for the lifetime of the pool.
+
+    Attributes:
+        clients (list): The EngineClient of every worker.
+    """
+    def __init__(self, size=None):
+        self.clients = [EngineClient() for _ in range(size or os.cpu_count() or 1)]
+
+    def analyse(self, jobs):
+        """
+        Analyse positions on every worker, yielding results as they complete.
+
+        A job that fails is yielded with the exception in place of its result, and the
+        remaining jobs carry on. Closing the generator early skips the jobs not yet started
+        and waits for the workers to finish the ones in progress, so the engines are idle
+        again when it returns.
+
+        Parameters:
+            jobs (iterable): Dicts of keyword arguments for EngineClient.analyse.
+
+        Yields:
+            (dict, dict or Exception): Each job together with its search result, or the
+            exception it raised, in completion order.
+
+        Raises:
+            Exception: Whatever the jobs iterable raised, once the jobs taken from it have finished.
+        """
+        pending = queue.Queue(maxsize=len(self.clients))
+        results = queue.Queue()
+        closed = threading.Event()
+
+        def work(client):
+            while True:
+                job = pending.get()
+                if job is None:
+                    # Tell the consumer that this worker is done
+                    results.put(None)
+                    return
+                if closed.is_set():
+                    continue
+                try:
+                    results.put((job, client.analyse(**job)))
+                except Exception as error:
+                    results.put((job, error))
+
+        threads = [threading.Thread(target=work, args=(client,), daemon=True) for client in self.clients]
+        for thread in threads:
+            thread.start()
+
+        # The exception raised by the jobs iterable, if any, to re-raise in the consumer
+        failure = []
+
+        def feed():
+            try:
+                for job in jobs:
+                    if closed.is_set():
+                        break
+                    pending.put(job)
+            except Exception as error:
+                failure.append(error)
+            finally:
+                for _ in threads:
+                    pending.put(None)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+
+        try:
+            finished = 0
+            while finished < len(threads):
+                item = results.get()
+                if item is None:
+                    finished += 1
+                    continue
+                yield item
+        finally:
+            closed.set()
+            feeder.join()
+            for thread in threads:
+                thread.join()
+        if failure:
+            raise failure[0]
+
+    def close(self):
+        """
+        Shut down every worker process.
+        """
+        for client in self.clients:
+            client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,323 @@
+import time
+from halma.board import WHITE_TO_MOVE
+from halma.symmetry import IDENTITY, swaps_colors, transform_move
+
+# Transposition table entry flags
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# How each flag reads once the score has been negated
+NEGATED_FLAGS = {EXACT: EXACT, LOWER: UPPER, UPPER: LOWER}
+
+
+class SearchAborted(Exception):
+    """
+    Raised inside the search when a time, node or stop limit has been reached.
+    """
+
+
+def position_key(board, max_player):
+    """
+    Returns the hash of a board together with the side to move.
+
+    Parameters:
+        board (Board): The board to hash.
+        max_player (bool): True if white (the maximizing player) is to move.
+
+    Returns:
+        int: The position key.
+    """
+    return board.hash ^ WHITE_TO_MOVE if max_player else board.hash
+
+
+def canonical_key(board, max_player):
+    """
+    Returns the key shared by a position and all of its symmetric images.
+
+    The images under the symmetries in halma.symmetry have the same game-theoretic
+    value, up to a sign change for the symmetries that swap the colors, so they can
+    share one transposition table entry. The smallest of their keys is used.
+
+    Parameters:
+        board (Board): The board to hash.
+        max_player (bool): True if white (the maximizing player) is to move.
+
+    Returns:
+        (int, int): The canonical key and the symmetry that maps the position onto
+        the canonical one.
+    """
+    max_player = bool(max_player)
+    best_key, best_symmetry = None, IDENTITY
+    for symmetry, value in enumerate(board.hashes):
+        # Swapping the colors also swaps the side to move
+        key = value ^ WHITE_TO_MOVE if max_player != swaps_colors(symmetry) else value
+        if best_key is None or key < best_key:
+            best_key, best_symmetry = key, symmetry
+    return best_key, best_symmetry
+
+
+class TranspositionTable:
+    """
+    A fixed-size table of search results indexed by position key.
+
+    Each slot holds a single (key, depth, value, flag, move) entry. A new entry
+    replaces the old one unless the old one belongs to the same position and was
+    searched deeper, so the table never grows beyond its initial size.
+
+    Attributes:
+        size (int): The number of slots in the table.
+        slots (list): The table entries, or None for empty slots.
+    """
+    def __init__(self, size=1 << 18):
+        self.size = size
+        self.slots = [None] * size
+
+    def get(self, key):
+        """
+        Look up a position.
+
+        Parameters:
+            key (int): The position key.
+
+        Returns:
+            tuple: The (key, depth, value, flag, move) entry, or None if the position is not stored.
+        """
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        """
+        Store the result of searching a position.
+
+        Parameters:
+            key (int): The position key.
+            depth (int): The depth the position was searched to.
+            value (float): The evaluation score found by the search.
+            flag (int): EXACT, LOWER or UPPER depending on how the score relates to the search window.
+            move (tuple): The best ((row, col), (row, col)) move found, or None.
+        """
+        index = key % self.size
+        entry = self.slots[index]
+        if entry is not None and entry[0] == key and entry[1] > depth:
+            return
+        self.slots[index] = (key, depth, value, flag, move)
+
+    def clear(self):
+        """
+        Remove every entry from the table.
+        """
+        self.slots = [None] * self.size
+
+
+class ProofTable:
+    """
+    A fixed-size table of proof and disproof numbers, used by minimax.pns.
+
+    Each slot holds a single (key, proof, disproof) entry and a new entry always
+    replaces the old one, so the table never grows beyond its initial size.
+
+    Attributes:
+        size (int): The number of slots in the table.
+        slots (list): The table entries, or None for empty slots.
+    """
+    def __init__(self, size=1 << 16):
+        self.size = size
+        self.slots = [None] * size
+
+    def get(self, key):
+        """
+        Look up the proof and disproof numbers of a node.
+
+        Parameters:
+            key (int): The node key.
+
+        Returns:
+            (int, int): The proof and disproof numbers, or None if the node is not stored.
+        """
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry[1], entry[2]
+        return None
+
+    def store(self, key, proof, disproof):
+        """
+        Store the proof and disproof numbers of a node.
+
+        Parameters:
+            key (int): The node key.
+            proof (int): The proof number.
+            disproof (int): The disproof number.
+        """
+        self.slots[key % self.size] = (key, proof, disproof)
+
+    def clear(self):
+        """
+        Remove every entry from the table.
+        """
+        self.slots = [None] * self.size
+
+
+class SearchContext:
+    """
+    State shared by every node of a search and kept between searches.
+
+    Passing a context to minimax enables the transposition table and the
+    search limits. The table survives between searches so later searches
+    start with warm caches. By default, symmetric positions share their
+    table entries (see canonical_key).
+
+    Attributes:
+        table (TranspositionTable): The transposition table.
+        nodes (int): The number of nodes visited by the current search.
+        node_limit (int): The maximum number of nodes to visit, or None.
+        deadline (float): The time.monotonic() value at which to stop, or None.
+        stop_event (threading.Event): An optional event that stops the search when set.
+        path (list): The position keys (see position_key) of the nodes between the root and the current node.
+        history (set): The position keys of the game positions played before the root.
+        excluded (set): Root moves to leave out of the current search.
+        symmetric (bool): True if symmetric positions share table entries.
+        draw_score (float): The score given to a position that repeats one in the path or history.
+        tracer (SearchTracer): Records the search for replaying later, or None.
+        lmr (bool): True to enable late move reductions (see minimax.algorithm.search_move).
+        lmr_min_depth (int): The smallest remaining depth at which moves are reduced.
+        lmr_min_moves (int): The number of moves searched at full depth before reductions start.
+        lmr_reduction (int): The number of plies a late move is reduced by.
+        futility (bool): True to enable futility pruning at frontier nodes.
+        futility_margin (float): The largest evaluation gain of a move that does not advance,
+            or None to derive it from the evaluation weights.
+        proof (bool): True to try proving a forced win before searching (see minimax.pns).
+        proof_threshold (int): The number of pieces a side must have in its goal zone
+            before a forced win for it is tried.
+        proof_plies (int): The longest forced win, in plies, to look for.
+        proof_nodes (int): The node budget of each proof.
+        proof_share (float): The largest fraction of a search's time and node limits the
+            proofs may use together.
+        proof_table (ProofTable): The proof and disproof numbers, kept between searches.
+    """
+    def __init__(self, table=None, stop_event=None, symmetric=True, draw_score=0.0, tracer=None,
+                 lmr=True, lmr_min_depth=3, lmr_min_moves=4, lmr_reduction=1,
+                 futility=True, futility_margin=None,
+                 proof=True, proof_threshold=7, proof_plies=5, proof_nodes=2000, proof_share=0.25):
+        self.table = table if table is not None else TranspositionTable()
+        self.stop_event = stop_event
+        self.symmetric = symmetric
+        self.draw_score = draw_score
+        self.tracer = tracer
+        self.lmr = lmr
+        self.lmr_min_depth = lmr_min_depth
+        self.lmr_min_moves = lmr_min_moves
+        self.lmr_reduction = lmr_reduction
+        self.futility = futility
+        self.futility_margin = futility_margin
+        self.proof = proof
+        self.proof_threshold = proof_threshold
+        self.proof_plies = proof_plies
+        self.proof_nodes = proof_nodes
+        self.proof_share = proof_share
+        self.proof_table = ProofTable()
+        self.nodes = 0
+        self.node_limit = None
+        self.deadline = None
+        self.path = []
+        self.history = set()
+        self.excluded = set()
+
+    def start(self, movetime=None, node_limit=None, excluded=(), history=()):
+        """
+        Reset the per-search counters and limits.
+
+        Parameters:
+            movetime (float): The time limit in seconds, or None.
+            node_limit (int): The node limit, or None.
+            excluded (iterable): Root moves to leave out of the search.
+            history (iterable): The position keys of the game positions played before the root.
+        """
+        self.nodes = 0
+        self.node_limit = node_limit
+        self.deadline = time.monotonic() + movetime if movetime is not None else None
+        self.path = []
+        self.history = set(history)
+        self.excluded = set(excluded)
+
+    def is_repetition(self, key):
+        """
+        Returns True if a position already occurred earlier in the game or the search path.
+
+        Parameters:
+            key (int): The position key, as returned by position_key.
+
+        Returns:
+            bool: True if the position is a repetition.
+        """
+        return key in self.history or key in self.path
+
+    def key(self, board, max_player):
+        """
+        Returns the table key of a position.
+
+        Parameters:
+            board (Board): The board to hash.
+            max_player (bool): True if white is to move.
+
+        Returns:
+            (int, int): The key and the symmetry that maps the position onto the stored one.
+        """
+        if self.symmetric:
+            return canonical_key(board, max_player)
+        return position_key(board, max_player), IDENTITY
+
+    def probe(self, key):
+        """
+        Look up a position in the transposition table.
+
+        Parameters:
+            key (tuple): The (key, symmetry) pair returned by the key method.
+
+        Returns:
+            tuple: The (depth, value, flag, move) stored for the position, with the value
+            and move mapped back to the position's own orientation, or None.
+        """
+        key, symmetry = key
+        entry = self.table.get(key)
+        if entry is None:
+            return None
+        _, depth, value, flag, move = entry
+        if swaps_colors(symmetry):
+            value, flag = -value, NEGATED_FLAGS[flag]
+        return depth, value, flag, transform_move(symmetry, move)
+
+    def store(self, key, depth, value, flag, move):
+        """
+        Store a search result in the transposition table.
+
+        Parameters:
+            key (tuple): The (key, symmetry) pair returned by the key method.
+            depth (int): The depth the position was searched to.
+            value (float): The evaluation score found by the search.
+            flag (int): EXACT, LOWER or UPPER.
+            move (tuple): The best move found, or None.
+        """
+        key, symmetry = key
+        if swaps_colors(symmetry):
+            value, flag = -value, NEGATED_FLAGS[flag]
+        self.table.store(key, depth, value, flag, transform_move(symmetry, move))
+
+    def check(self):
+        """
+        Count a node and abort the search if a limit has been reached.
+
+        Raises:
+            SearchAborted: If the stop event is set or the time or node limit has been reached.
+        """
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchAborted()
+        # Reading the clock is comparatively slow, so only do it every 64 nodes
+        if self.nodes & 63 == 0:
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise SearchAborted()
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                raise SearchAborted()
@@ -0,0 +1,271 @@
+"""
+A text-protocol engine server for driving the Halma AI without the game window.
+
+Run it with "python -m minimax.engine" and write one command per line to stdin:
+
+    isready                                 reply "readyok"
+    newgame                                 clear the transposition and proof tables
+    position startpos [moves m1 m2 ...]     set up the starting position, black to move
+    position layout <layout> <b|w> [moves m1 m2 ...]
+                                            set up a position string (see Board.to_string)
+    setoption <name> <value>                set a search option: lmr, futility or proof (on/off),
+                                            lmr_min_depth, lmr_min_moves, lmr_reduction,
+                                            proof_threshold, proof_plies, proof_nodes (integers)
+                                            or futility_margin, proof_share (numbers)
+    go [depth N] [movetime MS] [nodes N]    search the current position in the background
+    stop                                    stop the search and report the best move so far
+    d                                       print the current position
+    quit                                    exit
+
+A search reports "info depth D score S nodes N time MS pv m1 m2 ..." after every completed
+iteration and finishes with "bestmove m". When either side is close to its goal, the engine
+first tries to prove a forced win for it; if it finds one it reports "info ... mate M ..."
+with M the number of moves of the side to move until the win, negative when it is the
+opponent that wins. Scores are from white's point of view, as returned by Board.evaluate.
+Moves are written as "d1-f3" (see halma.notation).
+
+The transposition table is kept between commands so consecutive searches start warm.
+Positions reached by the moves of the position command count as history, and the search
+scores a return to any of them as a draw.
+"""
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import sys
+import threading
+from halma.board import Board
+from halma.notation import format_move, parse_move
+from minimax.algorithm import BLACK, WHITE
+from minimax.context import SearchContext
+from minimax.search import search
+
+COLOR_NAMES = {'b': BLACK, 'w': WHITE}
+
+
+def parse_switch(value):
+    """
+    Parse the value of an on/off option.
+
+    Parameters:
+        value (str): 'on' or 'off'.
+
+    Returns:
+        bool: True for 'on', False for 'off'.
+
+    Raises:
+        ValueError: If the value is neither 'on' nor 'off'.
+    """
+    if value not in ('on', 'off'):
+        raise ValueError(f"expected 'on' or 'off', got {value}")
+    return value == 'on'
+
+
+# Search options that can be changed with setoption, and how to parse their values
+OPTIONS = {
+    'lmr': parse_switch,
+    'futility': parse_switch,
+    'lmr_min_depth': int,
+    'lmr_min_moves': int,
+    'lmr_reduction': int,
+    'futility_margin': float,
+    'proof': parse_switch,
+    'proof_threshold': int,
+    'proof_plies': int,
+    'proof_nodes': int,
+    'proof_share': float,
+}
+
+
+class Engine:
+    """
+    Parses protocol commands and runs searches on a background thread.
+
+    Attributes:
+        board (Board): The current position.
+        turn (tuple): The color of the player to move.
+        history (list): The position keys of the positions played before the current one.
+        context (SearchContext): The search state shared by every search.
+        stop_event (threading.Event): Set to stop the running search.
+        thread (threading.Thread): The running search thread, or None.
+        out (file): The stream that responses are written to.
+    """
+    def __init__(self, out=sys.stdout):
+        self.board = Board()
+        self.turn = BLACK
+        self.history = []
+        self.stop_event = threading.Event()
+        self.context = SearchContext(stop_event=self.stop_event)
+        self.thread = None
+        self.out = out
+        self.lock = threading.Lock()
+
+    def send(self, line):
+        """
+        Write a line of output and flush it immediately.
+
+        Parameters:
+            line (str): The line to write.
+        """
+        with self.lock:
+            self.out.write(line + '\n')
+            self.out.flush()
+
+    def handle(self, line):
+        """
+        Handle a single command.
+
+        Parameters:
+            line (str): The command line.
+
+        Returns:
+            bool: False if the engine should exit, True otherwise.
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+
+        try:
+            if command == 'quit':
+                self.stop()
+                return False
+            elif command == 'isready':
+                self.send('readyok')
+            elif command == 'newgame':
+                self.stop()
+                self.context.table.clear()
+                self.context.proof_table.clear()
+            elif command == 'position':
+                self.stop()
+                self.set_position(args)
+            elif command == 'setoption':
+                self.stop()
+                self.set_option(args)
+            elif command == 'go':
+                self.stop()
+                self.go(args)
+            elif command == 'stop':
+                self.stop()
+            elif command == 'd':
+                # The search works on copies, so the position can be printed while it runs
+                self.send(f"info string {self.board.to_string()} {'w' if self.turn == WHITE else 'b'}")
+            else:
+                self.send(f"info string unknown command: {command}")
+        except ValueError as error:
+            self.send(f"info string error: {error}")
+
+        return True
+
+    def set_position(self, args):
+        """
+        Handle the arguments of a position command.
+
+        Parameters:
+            args (list): The tokens following "position".
+
+        Raises:
+            ValueError: If the position or one of the moves is invalid.
+        """
+        if args[:1] == ['startpos']:
+            board, turn, rest = Board(), BLACK, args[1:]
+        elif args[:1] == ['layout'] and len(args) >= 3 and args[2] in COLOR_NAMES:
+            board, turn, rest = Board.from_string(args[1]), COLOR_NAMES[args[2]], args[3:]
+        else:
+            raise ValueError("expected 'position startpos' or 'position layout <layout> <b|w>'")
+
+        if rest and rest[0] != 'moves':
+            raise ValueError(f"unexpected token: {rest[0]}")
+        history = []
+        for text in rest[1:]:
+            history.append(board.key(turn))
+            board.play(parse_move(text), turn)
+            turn = BLACK if turn == WHITE else WHITE
+
+        self.board, self.turn, self.history = board, turn, history
+
+    def set_option(self, args):
+        """
+        Handle the arguments of a setoption command.
+
+        Parameters:
+            args (list): The tokens following "setoption".
+
+        Raises:
+            ValueError: If the option is unknown or its value is invalid.
+        """
+        if len(args) != 2 or args[0] not in OPTIONS:
+            raise ValueError(f"expected 'setoption <name> <value>' with name one of {', '.join(OPTIONS)}")
+        name, value = args
+        setattr(self.context, name, OPTIONS[name](value))
+
+    def go(self, args):
+        """
+        Start searching the current position on a background thread.
+
+        Parameters:
+            args (list): The tokens following "go" as name/value pairs.
+
+        Raises:
+            ValueError: If a limit is unknown, has no value or is not a number.
+        """
+        if len(args) % 2:
+            raise ValueError(f"missing value for search limit: {args[-1]}")
+        limits = {'depth': None, 'movetime': None, 'nodes': None}
+        for name, value in zip(args[::2], args[1::2]):
+            if name not in limits:
+                raise ValueError(f"unknown search limit: {name}")
+            limits[name] = int(value)
+        movetime = limits['movetime'] / 1000 if limits['movetime'] is not None else None
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self.run_search,
+            args=(self.board, self.turn, self.history, limits['depth'], movetime, limits['nodes']),
+            daemon=True
+        )
+        self.thread.start()
+
+    def run_search(self, board, turn, history, depth, movetime, nodes):
+        """
+        Search a position and report the results. Runs on the search thread.
+        """
+        def report(info):
+            pv = ' '.join(format_move(move) for move in info['pv'])
+            mate = f" mate {info['mate']}" if 'mate' in info else ''
+            self.send(f"info depth {info['depth']} score {info['score']:.4f}{mate} nodes {info['nodes']} "
+                      f"time {int(info['time'] * 1000)} pv {pv}")
+
+        move, _ = search(board, turn, depth, movetime, nodes, self.context, report, history=history)
+        self.send(f"bestmove {format_move(move)}")
+
+    def stop(self):
+        """
+        Stop the running search, if any, and wait for it to report its best move.
+        """
+        self.stop_event.set()
+        self.wait()
+
+    def wait(self):
+        """
+        Wait for the running search, if any, to finish.
+        """
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+def main():
+    """
+    Read commands from stdin until "quit" or end of input, which stops the running search.
+    """
+    engine = Engine()
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+    else:
+        # The client has gone away, so nobody is waiting for the running search
+        engine.stop()
+
+
+if __name__ == '__main__':
+    main()
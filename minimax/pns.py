@@ -0,0 +1,265 @@
+"""
+Depth-first proof-number search (df-pn) for forced wins near the end of the game.
+
+Near the end of a game, one side may be able to fill the opponent's starting zone by
+force no matter how the other side replies. A fixed-depth minimax only sees this once
+the finish is within its horizon, and then still spends its whole budget on a position
+that is already decided. Proof-number search instead tries to prove or disprove a forced
+win directly and stops as soon as it has done so.
+
+The side trying to win is the attacker. Nodes where the attacker is to move are OR nodes
+(one winning move is enough), and nodes where the defender is to move are AND nodes (every
+reply must lose). Every node has a proof number, the least number of leaves that still
+have to be proven to prove the node, and a disproof number, the same for disproving it.
+A proven node has proof number 0 and a disproved node has disproof number 0.
+"""
+from copy import deepcopy
+from halma.board import SYMMETRIC_KEYS, WHITE_TO_MOVE
+from halma.geometry import SQUARE_BITS, ZONE_MASKS
+from halma.symmetry import IDENTITY
+from minimax.algorithm import BLACK, WHITE
+from minimax.context import ProofTable, SearchAborted
+
+INFINITY = 10 ** 9
+
+# Mixed into the node key once per remaining ply, so the same position with a
+# different remaining depth is a different node
+DEPTH_KEY = 0xD6E8FEB86659FD93
+
+# Mixed into the node key when white is the attacker, so proofs for both sides can share a table
+WHITE_ATTACKER_KEY = 0x2545F4914F6CDD1D
+
+
+def pieces_home(board, color):
+    """
+    Returns the number of pieces of a color in its goal zone (the opponent's starting zone).
+
+    Parameters:
+        board (Board): The board to check.
+        color (tuple): The color of the pieces to count.
+
+    Returns:
+        int: The number of pieces in the goal zone.
+    """
+    goal = ZONE_MASKS[WHITE if color == BLACK else BLACK]
+    return sum(1 for piece in board.get_all_pieces(color) if goal & SQUARE_BITS[piece.row][piece.col])
+
+
+class ProofSearch:
+    """
+    Proves or disproves that the attacker can force a win within a number of plies.
+
+    The search plays its moves on a single board and takes them back afterwards, and
+    the moves of every expanded node are generated only once and kept together with
+    the keys and missing-piece counts of the positions they lead to.
+
+    Attributes:
+        attacker (tuple): The color of the side trying to win.
+        node_limit (int): The maximum number of nodes to expand, or None.
+        table (ProofTable): The proof and disproof numbers of the nodes searched so far.
+        context (SearchContext): An optional search context whose limits also apply.
+        nodes (int): The number of nodes expanded so far.
+        children (dict): For the position key of every expanded node, its (move, position key,
+            missing) children.
+    """
+    def __init__(self, attacker, node_limit=None, table=None, context=None):
+        self.attacker = attacker
+        self.node_limit = node_limit
+        self.table = table if table is not None else ProofTable()
+        self.context = context
+        self.nodes = 0
+        self.children = {}
+        self.win = "White wins" if attacker == WHITE else "Black wins"
+        self.goal = ZONE_MASKS[WHITE if attacker == BLACK else BLACK]
+        self.attacker_key = WHITE_ATTACKER_KEY if attacker == WHITE else 0
+
+    def node_key(self, key, remaining):
+        """
+        Returns the table key of a node from its position key (see Board.key).
+        """
+        return key ^ (remaining * DEPTH_KEY & 0xFFFFFFFFFFFFFFFF) ^ self.attacker_key
+
+    def missing(self, board):
+        """
+        Returns the number of attacker pieces still outside the goal zone.
+        """
+        return len(board.get_all_pieces(self.attacker)) - pieces_home(board, self.attacker)
+
+    def attacker_moves(self, color, remaining):
+        """
+        Returns the number of moves the attacker has left when color is to move.
+        """
+        return (remaining + 1) // 2 if color == self.attacker else remaining // 2
+
+    def initial(self, color, remaining, missing):
+        """
+        Returns the proof and disproof numbers of a node that has not been searched yet.
+
+        The attacker has won once no piece is missing. Every attacker move brings at most
+        one piece into the goal zone, so the win is out of reach if more pieces are missing
+        than the attacker has moves left. Otherwise the proof number is the number of
+        missing pieces and the disproof number is 1.
+        """
+        if missing == 0:
+            return 0, INFINITY
+        if missing > self.attacker_moves(color, remaining):
+            return INFINITY, 0
+        return missing, 1
+
+    def expand(self, board, color, missing):
+        """
+        Returns the (move, position key, missing) of every child of a node.
+        """
+        keys = SYMMETRIC_KEYS[IDENTITY][color]
+        turn_key = WHITE_TO_MOVE if color == BLACK else 0
+        goal = self.goal
+        children = []
+        for piece in board.get_all_pieces(color):
+            row, col = piece.row, piece.col
+            for to_row, to_col in dict.fromkeys(board.get_valid_moves(piece)):
+                key = board.hash ^ keys[row][col] ^ keys[to_row][to_col] ^ turn_key
+                child_missing = missing
+                if color == self.attacker:
+                    child_missing += (bool(goal & SQUARE_BITS[row][col]) -
+                                      bool(goal & SQUARE_BITS[to_row][to_col]))
+                children.append((((row, col), (to_row, to_col)), key, child_missing))
+        return children
+
+    def mid(self, board, color, remaining, missing, proof_threshold, disproof_threshold):
+        """
+        Search a node until its proof or disproof number reaches its threshold.
+
+        Parameters:
+            board (Board): The position of the node. Moves are played on it and taken back.
+            color (tuple): The color of the player to move.
+            remaining (int): The number of plies the attacker has left to win in.
+            missing (int): The number of attacker pieces outside the goal zone.
+            proof_threshold (int): Stop once the proof number reaches this value.
+            disproof_threshold (int): Stop once the disproof number reaches this value.
+
+        Returns:
+            (int, int): The proof and disproof numbers of the node.
+
+        Raises:
+            SearchAborted: If the node budget or a limit of the search context has been reached.
+        """
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            raise SearchAborted()
+        if self.context is not None:
+            self.context.check()
+
+        position = board.key(color)
+        key = self.node_key(position, remaining)
+        stored = self.table.get(key)
+        if stored is not None and (stored[0] >= proof_threshold or stored[1] >= disproof_threshold):
+            return stored
+
+        # Terminal nodes: the game is over, or the attacker cannot win in the plies left
+        winner = board.winner()
+        if winner is not None:
+            result = (0, INFINITY) if winner == self.win else (INFINITY, 0)
+            self.table.store(key, *result)
+            return result
+        if missing > self.attacker_moves(color, remaining):
+            self.table.store(key, INFINITY, 0)
+            return INFINITY, 0
+
+        children = self.children.get(position)
+        if children is None:
+            children = self.children[position] = self.expand(board, color, missing)
+        if not children:
+            self.table.store(key, INFINITY, 0)
+            return INFINITY, 0
+
+        or_node = color == self.attacker
+        next_color = WHITE if color == BLACK else BLACK
+        child_keys = [self.node_key(child_key, remaining - 1) for _, child_key, _ in children]
+        while True:
+            numbers = [self.table.get(child_key) or self.initial(next_color, remaining - 1, child_missing)
+                       for child_key, (_, _, child_missing) in zip(child_keys, children)]
+            if or_node:
+                proof = min(number[0] for number in numbers)
+                disproof = min(sum(number[1] for number in numbers), INFINITY)
+            else:
+                proof = min(sum(number[0] for number in numbers), INFINITY)
+                disproof = min(number[1] for number in numbers)
+            if proof >= proof_threshold or disproof >= disproof_threshold:
+                break
+
+            # Expand the most promising child, with thresholds that make it return as soon
+            # as another child becomes more promising
+            side = 0 if or_node else 1
+            order = sorted(range(len(children)), key=lambda index: numbers[index][side])
+            best = order[0]
+            second = numbers[order[1]][side] if len(order) > 1 else INFINITY
+            child_proof, child_disproof = numbers[best]
+            if or_node:
+                child_proof_threshold = min(proof_threshold, second + 1)
+                child_disproof_threshold = min(disproof_threshold - disproof + child_disproof, INFINITY)
+            else:
+                child_proof_threshold = min(proof_threshold - proof + child_proof, INFINITY)
+                child_disproof_threshold = min(disproof_threshold, second + 1)
+
+            (from_square, to_square), _, child_missing = children[best]
+            piece = board.get_piece(*from_square)
+            board.move(piece, *to_square)
+            try:
+                self.mid(board, next_color, remaining - 1, child_missing,
+                         child_proof_threshold, child_disproof_threshold)
+            finally:
+                board.move(piece, *from_square)
+
+        self.table.store(key, proof, disproof)
+        return proof, disproof
+
+    def winning_move(self, board, color, remaining):
+        """
+        Returns a move of a proven OR node that leads to a proven child, or None.
+        """
+        for move, child_key, child_missing in self.children.get(board.key(color), ()):
+            if child_missing == 0 or self.table.get(self.node_key(child_key, remaining - 1)) == (0, INFINITY):
+                return move
+        return None
+
+
+def prove(board, attacker, color, max_plies=5, node_limit=20000, table=None, context=None):
+    """
+    Try to prove that the attacker can force a win within max_plies plies.
+
+    Shorter wins are tried first, so a proven win is also the shortest one.
+
+    Parameters:
+        board (Board): The position to start from.
+        attacker (tuple): The color of the side trying to win.
+        color (tuple): The color of the player to move.
+        max_plies (int): The longest win to look for, in plies.
+        node_limit (int): The node budget, or None.
+        table (ProofTable): The proof table to use. Reusing one keeps earlier results.
+        context (SearchContext): An optional search context whose limits also apply.
+
+    Returns:
+        dict: "proven" is True if a forced win was found, False if there is none within
+        max_plies and None if the budget ran out first. "plies" is the length of the win,
+        "move" the first winning move when the attacker is to move, and "nodes" the
+        number of nodes expanded.
+    """
+    searcher = ProofSearch(attacker, node_limit, table, context)
+    # The search plays its moves on the board, so give it a copy
+    board = deepcopy(board)
+    missing = searcher.missing(board)
+    # The attacker can only complete its zone on its own moves
+    first = 1 if color == attacker else 2
+    result = {'proven': False, 'plies': None, 'move': None, 'nodes': 0}
+    try:
+        for plies in range(first, max_plies + 1, 2):
+            proof, _ = searcher.mid(board, color, plies, missing, INFINITY, INFINITY)
+            if proof == 0:
+                result['proven'], result['plies'] = True, plies
+                if color == attacker:
+                    result['move'] = searcher.winning_move(board, color, plies)
+                break
+    except SearchAborted:
+        result['proven'] = None
+    result['nodes'] = searcher.nodes
+    return result
@@ -0,0 +1,240 @@
+import time
+from copy import deepcopy
+from minimax.algorithm import minimax, get_all_moves, BLACK, WHITE
+from minimax.context import SearchContext, SearchAborted
+from minimax.pns import pieces_home, prove
+
+MATE_SCORE = 1000.0
+
+MAX_DEPTH = 64
+
+
+def search(board, color, depth=None, movetime=None, nodes=None, context=None, on_info=None, excluded=(),
+           history=()):
+    """
+    Search a position with iterative deepening until a depth, time or node limit is reached.
+
+    Each iteration searches one ply deeper than the previous one. An iteration that is
+    interrupted by a limit is discarded and the result of the last completed iteration
+    is returned, so the engine always has a move ready.
+
+    Parameters:
+        board (Board): The position to search.
+        color (tuple): The color of the player to move.
+        depth (int): The maximum depth to search, or None for no depth limit.
+        movetime (float): The time limit in seconds, or None.
+        nodes (int): The node limit, or None.
+        context (SearchContext): The search state to use. Reusing a context between
+            searches keeps its transposition table warm.
+        on_info (callable): Called with a dict of search statistics after every completed iteration.
+        excluded (iterable): Root moves to leave out of the search.
+        history (iterable): The position keys (see Board.key) of the game positions played
+            before this one. Moves that return to one of them are scored as draws.
+
+    Returns:
+        (tuple, float): The best ((row, col), (row, col)) move and its evaluation score, or
+        (None, score) if the game is already over or the side to move has no moves. A forced
+        win found by the proof search, for either side, scores MATE_SCORE minus its length in
+        plies, negated for black.
+    """
+    if context is None:
+        context = SearchContext()
+    context.start(movetime, nodes, excluded, history)
+    max_player = color == WHITE
+    max_depth = depth if depth is not None else MAX_DEPTH
+
+    if board.winner() is not None:
+        return None, board.evaluate()
+
+    # Make sure there is always a move to return, even if the first iteration is interrupted
+    excluded = context.excluded
+    first = next((move for move in get_all_moves(board, color, None) if move.last_move not in excluded), None)
+    if first is None:
+        return None, board.evaluate()
+    best_move, best_value = first.last_move, first.evaluate()
+    start = time.monotonic()
+
+    # Close to the goal, try to prove a forced win for either side before searching at fixed depths
+    proof = prove_win(board, color, movetime, nodes, context) if context.proof and not excluded else None
+    mate = None
+    if proof is not None:
+        attacker, result = proof
+        value = mate_score(attacker, result['plies'])
+        if attacker == color and result['move'] is not None:
+            if on_info is not None:
+                on_info({
+                    'depth': result['plies'],
+                    'score': value,
+                    'mate': (result['plies'] + 1) // 2,
+                    'nodes': context.nodes,
+                    'time': time.monotonic() - start,
+                    'pv': [result['move']],
+                })
+            return result['move'], value
+        if attacker != color:
+            # Every move loses, so a shallow search is enough to pick one that holds out longest
+            mate = value, -(result['plies'] // 2)
+            max_depth = min(max_depth, result['plies'])
+            best_value = value
+
+    for current_depth in range(1, max_depth + 1):
+        if context.tracer is not None:
+            context.tracer.begin(board, color, current_depth)
+        try:
+            value, new_board = minimax(board, current_depth, float('-inf'), float('inf'),
+                                       max_player, None, context)
+        except SearchAborted:
+            break
+        if new_board is None:
+            break
+        best_move, best_value = new_board.last_move, value if mate is None else mate[0]
+
+        if on_info is not None:
+            elapsed = time.monotonic() - start
+            pv = [best_move] + principal_variation(new_board, not max_player, context, current_depth - 1)
+            info = {
+                'depth': current_depth,
+                'score': best_value,
+                'nodes': context.nodes,
+                'time': elapsed,
+                'pv': pv,
+            }
+            if mate is not None:
+                info['mate'] = mate[1]
+            on_info(info)
+
+    return best_move, best_value
+
+
+def mate_score(attacker, plies):
+    """
+    Returns the score of a forced win, from white's point of view.
+
+    Parameters:
+        attacker (tuple): The color of the winning side.
+        plies (int): The length of the win in plies.
+
+    Returns:
+        float: MATE_SCORE minus the length of the win, negated if black wins.
+    """
+    return MATE_SCORE - plies if attacker == WHITE else plies - MATE_SCORE
+
+
+def prove_win(board, color, movetime, nodes, context):
+    """
+    Try to prove a forced win for each side that has enough pieces in its goal zone
+    (see SearchContext.proof_threshold), the side with fewer pieces left to bring home first.
+
+    Each proof gets up to context.proof_nodes nodes. Together the proofs use at most
+    context.proof_share of the time and node limits of the search, split evenly between
+    them, so a proof that fails still leaves most of the budget to the fixed-depth search
+    and cannot starve the other side's proof.
+
+    Parameters:
+        board (Board): The position to search.
+        color (tuple): The color of the player to move.
+        movetime (float): The time limit of the search in seconds, or None.
+        nodes (int): The node limit of the search, or None.
+        context (SearchContext): The search state, already started.
+
+    Returns:
+        (tuple, dict): The color of the winning side and the result of minimax.pns.prove,
+        or None if no forced win was proven.
+    """
+    attackers = [attacker for attacker in (color, WHITE if color == BLACK else BLACK)
+                 if pieces_home(board, attacker) >= context.proof_threshold]
+    # The side to move breaks ties, as sorted keeps the order of equal elements
+    attackers.sort(key=lambda attacker: len(board.get_all_pieces(attacker)) - pieces_home(board, attacker))
+    if not attackers:
+        return None
+
+    budget = context.proof_nodes
+    if nodes is not None:
+        budget = min(budget, int(nodes * context.proof_share / len(attackers)))
+    deadline = context.deadline
+
+    try:
+        for attacker in attackers:
+            if budget <= 0:
+                break
+            if movetime is not None:
+                context.deadline = time.monotonic() + movetime * context.proof_share / len(attackers)
+            result = prove(board, attacker, color, context.proof_plies, budget, context.proof_table, context)
+            if result['proven']:
+                return attacker, result
+    finally:
+        context.deadline = deadline
+    return None
+
+
+def search_multipv(board, color, count, depth=None, movetime=None, nodes=None, context=None, history=()):
+    """
+    Find the best few moves of a position.
+
+    The position is searched once per line, each time leaving out the moves already
+    found. The time and node limits are split evenly between the lines.
+
+    Parameters:
+        board (Board): The position to search.
+        color (tuple): The color of the player to move.
+        count (int): The maximum number of lines to return.
+        depth (int): The maximum depth to search, or None for no depth limit.
+        movetime (float): The total time limit in seconds, or None.
+        nodes (int): The total node limit, or None.
+        context (SearchContext): The search state to use.
+        history (iterable): The position keys of the game positions played before this one.
+
+    Returns:
+        list: Up to count dicts with the "move", "score", "depth" and "pv" of each line, best first.
+    """
+    if context is None:
+        context = SearchContext()
+    movetime = movetime / count if movetime is not None else None
+    nodes = nodes // count if nodes is not None else None
+
+    lines = []
+    for _ in range(count):
+        infos = []
+        move, value = search(board, color, depth, movetime, nodes, context, infos.append,
+                             excluded=[line['move'] for line in lines], history=history)
+        if move is None:
+            break
+        info = infos[-1] if infos and infos[-1]['pv'][0] == move else None
+        lines.append({
+            'move': move,
+            'score': value,
+            'depth': info['depth'] if info else 0,
+            'pv': info['pv'] if info else [move],
+        })
+    return lines
+
+
+def principal_variation(board, max_player, context, depth):
+    """
+    Follow the best moves stored in the transposition table from a position.
+
+    Parameters:
+        board (Board): The position to start from.
+        max_player (bool): True if white is to move.
+        context (SearchContext): The search state holding the transposition table.
+        depth (int): The maximum number of moves to follow.
+
+    Returns:
+        list: The ((row, col), (row, col)) moves of the principal variation.
+    """
+    line = []
+    board = deepcopy(board)
+    seen = set()
+    while len(line) < depth:
+        key = context.key(board, max_player)
+        entry = context.probe(key)
+        if entry is None or entry[3] is None or key[0] in seen:
+            break
+        seen.add(key[0])
+        try:
+            board.play(entry[3], WHITE if max_player else BLACK)
+        except ValueError:
+            break
+        line.append(entry[3])
+        max_player = not max_player
+    return line
@@ -0,0 +1,185 @@
+import json
+from collections import deque
+from halma.constants import WHITE
+from halma.notation import format_move
+
+
+class SearchTracer:
+    """
+    Records what the search does as a stream of small events, for replaying later.
+
+    Events are tuples kept in a ring buffer holding the most recent ones, and are
+    optionally also appended to a JSON lines file. Each event starts with its kind
+    and the ply (distance from the root) of the node it belongs to:
+
+        ("search", 0, layout, color, depth)            a new root search begins
+        ("enter", ply, move, depth, alpha, beta)       a node is expanded
+        ("exit", ply, value, best_move)                a node has been searched
+        ("cutoff", ply, move, value)                   a move caused an alpha-beta cutoff
+        ("leaf", ply, move, value, reason)             a node was scored without being expanded,
+                                                       reason is "eval", "table" or "repeat"
+
+    move is the move that led to the node (None for the root). To keep the cost down,
+    nodes deeper than max_ply are not recorded, and with sample > 1 only one in every
+    sample subtrees is recorded. The subtree of a node that is not recorded is skipped
+    entirely, so a replay can always rebuild the board of every recorded node.
+
+    Attributes:
+        events (collections.deque): The most recent events.
+        file (file): The file events are written to, or None.
+        max_ply (int): The deepest ply to record, or None for no limit.
+        sample (int): Record one in every sample subtrees.
+    """
+    def __init__(self, capacity=100000, path=None, max_ply=None, sample=1):
+        self.events = deque(maxlen=capacity)
+        self.file = open(path, 'w') if path is not None else None
+        self.max_ply = max_ply
+        self.sample = sample
+        self.count = 0
+        self.muted_ply = None
+        self.search_event = None
+
+    def record(self, event):
+        """
+        Add an event to the ring buffer and the trace file.
+
+        Parameters:
+            event (tuple): The event to record.
+        """
+        self.events.append(event)
+        if self.file is not None:
+            self.file.write(json.dumps(encode_event(event)) + '\n')
+
+    def accept(self, ply):
+        """
+        Decide whether a node at the given ply should be recorded.
+
+        Parameters:
+            ply (int): The ply of the node.
+
+        Returns:
+            bool: True if the node should be recorded.
+        """
+        if self.muted_ply is not None:
+            if ply > self.muted_ply:
+                return False
+            # The search has left the skipped subtree
+            self.muted_ply = None
+        if self.max_ply is not None and ply > self.max_ply:
+            return False
+        # The root is always recorded so that every search can be replayed
+        if self.sample > 1 and ply > 0:
+            self.count += 1
+            if self.count % self.sample:
+                self.muted_ply = ply
+                return False
+        return True
+
+    def begin(self, board, color, depth):
+        """
+        Record the start of a root search.
+
+        Parameters:
+            board (Board): The root position.
+            color (tuple): The color of the player to move.
+            depth (int): The depth of the search.
+        """
+        self.muted_ply = None
+        self.search_event = ("search", 0, board.to_string(), 'w' if color == WHITE else 'b', depth)
+        self.record(self.search_event)
+
+    def enter(self, ply, move, depth, alpha, beta):
+        """
+        Record a node being expanded.
+
+        Returns:
+            bool: True if the node was recorded, in which case its exit and cutoffs should be too.
+        """
+        if not self.accept(ply):
+            return False
+        self.record(("enter", ply, move, depth, alpha, beta))
+        return True
+
+    def exit(self, ply, value, best_move):
+        """
+        Record the result of a node recorded by enter.
+        """
+        self.record(("exit", ply, value, best_move))
+
+    def cutoff(self, ply, move, value):
+        """
+        Record a cutoff at a node recorded by enter.
+        """
+        self.record(("cutoff", ply, move, value))
+
+    def leaf(self, ply, move, value, reason):
+        """
+        Record a node that was scored without being expanded.
+        """
+        if self.accept(ply):
+            self.record(("leaf", ply, move, value, reason))
+
+    def save(self, path):
+        """
+        Write the events in the ring buffer to a JSON lines file.
+
+        Once the buffer has wrapped, the event that began the oldest search still in it may
+        have been overwritten, so it is written first to give the replay its root position.
+
+        Parameters:
+            path (str): The path of the file to write.
+        """
+        events = list(self.events)
+        if events and events[0][0] != "search":
+            first = next((index for index, event in enumerate(events) if event[0] == "search"), len(events))
+            if first == len(events):
+                # Every event belongs to the latest search
+                events.insert(0, self.search_event)
+            else:
+                # The events before the first complete search belong to one whose start is lost
+                events = events[first:]
+        with open(path, 'w') as file:
+            for event in events:
+                file.write(json.dumps(encode_event(event)) + '\n')
+
+    def close(self):
+        """
+        Close the trace file, if any.
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def encode_event(event):
+    """
+    Returns a JSON-friendly copy of an event with its moves in text form.
+
+    Parameters:
+        event (tuple): The event to encode.
+
+    Returns:
+        list: The encoded event.
+    """
+    kind = event[0]
+    if kind in ("enter", "cutoff", "leaf"):
+        return [kind, event[1], format_move(event[2])] + list(event[3:])
+    if kind == "exit":
+        return [kind, event[1], event[2], format_move(event[3])]
+    return list(event)
+
+
+def read_trace(path):
+    """
+    Read the events of a trace file.
+
+    Parameters:
+        path (str): The path of the trace file.
+
+    Yields:
+        list: Each event, with moves left in text form.
+    """
+    with open(path) as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,137 @@
+"""
+Replay a recorded search trace at any speed.
+
+Usage:
+    python replay.py trace.jsonl [--speed EVENTS_PER_SECOND]
+
+Record a trace by giving the search context a tracer, e.g.
+
+    context = SearchContext(tracer=SearchTracer(path="trace.jsonl", max_ply=2))
+    search(board, WHITE, depth=3, context=context)
+
+Controls: space pauses and resumes, the right arrow steps one event while paused,
+and the up and down arrows double or halve the replay speed.
+"""
+import argparse
+from copy import deepcopy
+import pygame
+from halma.board import Board
+from halma.constants import *
+from halma.notation import parse_move
+from minimax.trace import read_trace
+
+FPS = 60
+
+
+def replay_boards(events):
+    """
+    Rebuild the board of every traced event.
+
+    Parameters:
+        events (iterable): Events as returned by read_trace.
+
+    Yields:
+        (list, Board, tuple): Each event, the board it refers to and the move to highlight (or None).
+    """
+    stack = []
+    for event in events:
+        kind, ply = event[0], event[1]
+        if kind == "search":
+            stack = [Board.from_string(event[2])]
+            yield event, stack[0], None
+        elif kind in ("enter", "leaf") and ply > 0:
+            # A trace saved from a wrapped ring buffer can start inside a subtree,
+            # so skip nodes until the replay has seen their parent
+            if len(stack) < ply:
+                continue
+            # Play the move leading to the node on a copy of its parent
+            move = parse_move(event[2])
+            board = deepcopy(stack[ply - 1])
+            board.move(board.get_piece(*move[0]), *move[1])
+            if kind == "enter":
+                del stack[ply:]
+                stack.append(board)
+            yield event, board, move
+        elif len(stack) <= ply:
+            continue
+        elif kind == "enter":
+            yield event, stack[0], None
+        elif kind in ("exit", "cutoff"):
+            move_text = event[3] if kind == "exit" else event[2]
+            move = parse_move(move_text) if move_text != "(none)" else None
+            yield event, stack[ply], move
+
+
+def draw(win, board, move):
+    """
+    Draw a board and highlight a move on it.
+
+    Parameters:
+        win (pygame.Surface): The window to draw on.
+        board (Board): The board to draw.
+        move (tuple): The ((row, col), (row, col)) move to highlight, or None.
+    """
+    board.draw(win)
+    if move is not None:
+        for row, col in move:
+            center = (col * SQUARE_SIZE + SQUARE_SIZE // 2, row * SQUARE_SIZE + SQUARE_SIZE // 2)
+            pygame.draw.circle(win, LIGHT_GREEN, center, 47, 10)
+    pygame.display.update()
+
+
+def main():
+    """
+    Parse the command line arguments and play back the trace.
+    """
+    parser = argparse.ArgumentParser(description="Replay a recorded Halma search trace.")
+    parser.add_argument('trace', help="trace file written by SearchTracer")
+    parser.add_argument('--speed', type=float, default=20, help="events per second")
+    args = parser.parse_args()
+
+    win = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+    frames = replay_boards(read_trace(args.trace))
+    speed, paused, step, due = args.speed, False, False, 0.0
+
+    run = True
+    while run:
+        clock.tick(FPS)
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                run = False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    step = True
+                elif event.key == pygame.K_UP:
+                    speed *= 2
+                elif event.key == pygame.K_DOWN:
+                    speed /= 2
+
+        # Work out how many events to show this frame
+        if paused:
+            count = 1 if step else 0
+        else:
+            due += speed / FPS
+            count, due = int(due), due - int(due)
+        step = False
+
+        # Only the last of the events shown in a frame needs to be drawn
+        frame = None
+        for _ in range(count):
+            frame = next(frames, None)
+            if frame is None:
+                paused = True
+                break
+        if frame is not None:
+            event, board, move = frame
+            pygame.display.set_caption(f"Halma search replay - {' '.join(str(field) for field in event)}")
+            draw(win, board, move)
+
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    main()
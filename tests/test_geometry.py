@@ -0,0 +1,48 @@
+"""
+Tests of the precomputed board geometry (see halma.geometry).
+"""
+import tempfile
+import unittest
+from unittest import mock
+from halma import geometry
+from halma.constants import *
+from halma.geometry import build_geometry, load_geometry
+
+
+def squares(mask, rows, cols):
+    """
+    Returns the set of (row, col) squares in a zone mask.
+    """
+    return {(row, col) for row in range(rows) for col in range(cols) if mask >> (row * cols + col) & 1}
+
+
+class GeometryTest(unittest.TestCase):
+
+    def test_standard_zones(self):
+        zones = build_geometry(ROWS, COLS)['zones']
+        self.assertEqual(squares(zones[BLACK], ROWS, COLS), set(BLACK_START))
+        self.assertEqual(squares(zones[WHITE], ROWS, COLS), set(WHITE_START))
+
+    def test_large_board_zones(self):
+        rows = cols = 40
+        # Large boards go through the disk cache, so give it a directory of its own
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(geometry, 'CACHE_DIR', directory):
+            zones = load_geometry(rows, cols)['zones']
+            self.assertEqual(load_geometry(rows, cols)['zones'], zones)
+        black, white = squares(zones[BLACK], rows, cols), squares(zones[WHITE], rows, cols)
+        self.assertIn((0, 0), black)
+        self.assertIn((rows - 1, cols - 1), white)
+        self.assertEqual({(rows - 1 - row, cols - 1 - col) for row, col in black}, white)
+        self.assertFalse(black & white)
+
+    def test_jumps_stay_on_board(self):
+        for rows, cols in ((ROWS, COLS), (5, 9)):
+            for row_jumps in build_geometry(rows, cols)['jumps']:
+                for square in row_jumps:
+                    for (over_row, over_col), (row, col) in square:
+                        self.assertTrue(0 <= row < rows and 0 <= col < cols)
+                        self.assertTrue(0 <= over_row < rows and 0 <= over_col < cols)
+
+
+if __name__ == '__main__':
+    unittest.main()
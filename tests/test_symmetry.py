@@ -0,0 +1,125 @@
+"""
+Tests that symmetric positions are evaluated, hashed and searched alike (see halma.symmetry).
+"""
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import random
+import unittest
+from halma.board import Board, LAYOUT_CHARS
+from halma.constants import *
+from halma.symmetry import SYMMETRIES, opposite, swaps_colors, transform_move, transform_square
+from minimax.algorithm import get_all_moves
+from minimax.context import SearchContext, canonical_key
+from minimax.search import search
+
+
+def random_position(rng, plies):
+    """
+    Play random moves from the starting position.
+
+    Returns:
+        (Board, tuple): The position reached and the color of the player to move.
+    """
+    board, color = Board(), BLACK
+    for _ in range(plies):
+        moves = list(get_all_moves(board, color, None))
+        if not moves or board.winner() is not None:
+            break
+        board = rng.choice(moves)
+        color = opposite(color)
+    return board, color
+
+
+def image(board, color, symmetry):
+    """
+    Returns the image of a position under a symmetry, as a new board and the color to move.
+    """
+    grid = [['.'] * COLS for _ in range(ROWS)]
+    for row in range(ROWS):
+        for col in range(COLS):
+            piece = board.get_piece(row, col)
+            if piece != 0:
+                image_row, image_col = transform_square(symmetry, row, col)
+                piece_color = opposite(piece.color) if swaps_colors(symmetry) else piece.color
+                grid[image_row][image_col] = LAYOUT_CHARS[piece_color]
+
+    rows = []
+    for cells in grid:
+        text, empty = '', 0
+        for cell in cells:
+            if cell == '.':
+                empty += 1
+                continue
+            if empty:
+                text += str(empty)
+                empty = 0
+            text += cell
+        rows.append(text + (str(empty) if empty else ''))
+
+    return Board.from_string('/'.join(rows)), opposite(color) if swaps_colors(symmetry) else color
+
+
+def is_legal(board, color, move):
+    """
+    Returns True if the move is legal for the given color.
+    """
+    return any(child.last_move == move for child in get_all_moves(board, color, None))
+
+
+class SymmetryTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(2024)
+        self.positions = [random_position(rng, rng.randint(2, 30)) for _ in range(6)]
+
+    def test_evaluation(self):
+        for board, color in self.positions:
+            for symmetry in SYMMETRIES:
+                image_board, _ = image(board, color, symmetry)
+                expected = -board.evaluate() if swaps_colors(symmetry) else board.evaluate()
+                self.assertAlmostEqual(image_board.evaluate(), expected)
+
+    def test_symmetric_hashes(self):
+        for board, color in self.positions:
+            for symmetry in SYMMETRIES:
+                image_board, _ = image(board, color, symmetry)
+                self.assertEqual(image_board.hash, board.hashes[symmetry])
+
+    def test_incremental_hashes(self):
+        rng = random.Random(7)
+        board, color = Board(), BLACK
+        for _ in range(40):
+            moves = list(get_all_moves(board, color, None))
+            if not moves:
+                break
+            (from_row, from_col), (to_row, to_col) = rng.choice(moves).last_move
+            board.move(board.get_piece(from_row, from_col), to_row, to_col)
+            self.assertEqual(board.hashes, board.compute_hashes())
+            color = opposite(color)
+
+    def test_canonical_key_of_color(self):
+        # Callers may pass the color of the player to move instead of a boolean
+        for board, _ in self.positions:
+            self.assertEqual(canonical_key(board, WHITE), canonical_key(board, True))
+            self.assertEqual(canonical_key(board, 0), canonical_key(board, False))
+
+    def test_search(self):
+        for board, color in self.positions[:3]:
+            plain_move, plain_value = search(board, color, depth=2, context=SearchContext(symmetric=False))
+            self.assertTrue(is_legal(board, color, plain_move))
+
+            # One context for every image, so later searches hit entries stored by earlier ones
+            context = SearchContext(symmetric=True)
+            for symmetry in SYMMETRIES:
+                image_board, image_color = image(board, color, symmetry)
+                move, value = search(image_board, image_color, depth=2, context=context)
+                expected = -plain_value if swaps_colors(symmetry) else plain_value
+                self.assertAlmostEqual(value, expected)
+                self.assertTrue(is_legal(image_board, image_color, move))
+                # Every symmetry is its own inverse, so the same transform maps the move back
+                self.assertTrue(is_legal(board, color, transform_move(symmetry, move)))
+
+
+if __name__ == '__main__':
+    unittest.main()
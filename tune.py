@@ -0,0 +1,221 @@
+"""
+Fit the evaluation weights to game results (Texel tuning).
+
+Usage:
+    python tune.py positions.txt [--output weights.json] [--epochs N] [--batch-size N]
+
+The dataset holds one position per line as "<layout> <result>", where layout is a position
+string (see Board.to_string) and result is white's score in the game the position came from:
+1 for a white win, 0 for a black win and 0.5 for a draw.
+
+The positions are turned into a matrix of evaluation factors in a single streaming pass.
+The weights are then fitted so that sigmoid(scale * evaluation) predicts the results with
+the smallest mean squared error, using mini-batch gradient descent. The fitted weights are
+written to a file that Board.evaluate loads at startup (see halma.weights).
+
+Requires NumPy.
+"""
+import os
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import sys
+import time
+from itertools import islice
+import numpy as np
+from halma.constants import *
+from halma.geometry import HOME_DISTANCE, SQUARE_BITS, ZONE_MASKS
+from halma.weights import EVAL_WEIGHTS, WEIGHTS_FILE, save_weights
+
+# Evaluation factors in the order of the columns of the feature matrix
+FACTORS = ('distance', 'proximity', 'start_penalty')
+
+# Turns a position string into one character per square
+EXPAND = str.maketrans({**{str(n): '.' * n for n in range(1, COLS + 1)}, '/': ''})
+
+
+def square_features():
+    """
+    Returns the contribution of a piece on each square to each evaluation factor.
+
+    Returns:
+        (numpy.ndarray, numpy.ndarray): Two (ROWS * COLS, 3) matrices, for white and for black
+        pieces, matching Board.features.
+    """
+    white = np.zeros((ROWS * COLS, len(FACTORS)))
+    black = np.zeros((ROWS * COLS, len(FACTORS)))
+    for row in range(ROWS):
+        for col in range(COLS):
+            square = row * COLS + col
+            in_black_zone = bool(ZONE_MASKS[BLACK] & SQUARE_BITS[row][col])
+            in_white_zone = bool(ZONE_MASKS[WHITE] & SQUARE_BITS[row][col])
+            white[square] = (HOME_DISTANCE[WHITE][row][col], in_black_zone, in_white_zone)
+            black[square] = (-HOME_DISTANCE[BLACK][row][col], -in_white_zone, -in_black_zone)
+    return white, black
+
+
+def read_features(path, chunk_size=100000):
+    """
+    Read a dataset and extract the evaluation factors of every position.
+
+    Parameters:
+        path (str): The dataset to read.
+        chunk_size (int): The number of lines converted at once.
+
+    Returns:
+        (numpy.ndarray, numpy.ndarray): The (n, 3) feature matrix and the n results.
+
+    Raises:
+        ValueError: If a line is not a valid position and result.
+    """
+    white_table, black_table = square_features()
+    features, results = [], []
+    with open(path) as file:
+        while True:
+            lines = [line.split() for line in islice(file, chunk_size)]
+            lines = [line for line in lines if line]
+            if not lines:
+                break
+            if any(len(line) != 2 for line in lines):
+                raise ValueError(f"expected '<layout> <result>' lines in {path}")
+
+            squares = ''.join(layout.translate(EXPAND) for layout, _ in lines)
+            if len(squares) != len(lines) * ROWS * COLS:
+                raise ValueError(f"invalid position string in {path}")
+            board = np.frombuffer(squares.encode(), dtype=np.uint8).reshape(len(lines), ROWS * COLS)
+            white = (board == ord('w')).astype(np.float64)
+            black = (board == ord('b')).astype(np.float64)
+
+            features.append(white @ white_table + black @ black_table)
+            results.append(np.array([float(result) for _, result in lines]))
+
+    if not features:
+        raise ValueError(f"no positions in {path}")
+    return np.concatenate(features), np.concatenate(results)
+
+
+def to_vector(weights):
+    """
+    Returns the weights as a vector matching the columns of the feature matrix.
+    """
+    # The start penalty is subtracted by Board.evaluate
+    return np.array([weights['distance'], weights['proximity'], -weights['start_penalty']])
+
+
+def from_vector(vector):
+    """
+    Returns the weights dict for a vector produced by to_vector.
+    """
+    return {'distance': float(vector[0]), 'proximity': float(vector[1]), 'start_penalty': float(-vector[2])}
+
+
+def sigmoid(x):
+    """
+    Returns the logistic function of every element of x.
+    """
+    return 0.5 * (1 + np.tanh(0.5 * x))
+
+
+def error(features, results, vector, scale):
+    """
+    Returns the mean squared error of the predicted results.
+
+    Parameters:
+        features (numpy.ndarray): The feature matrix.
+        results (numpy.ndarray): The game results.
+        vector (numpy.ndarray): The weights, as returned by to_vector.
+        scale (float): The factor turning evaluation scores into win probabilities.
+
+    Returns:
+        float: The mean squared error.
+    """
+    return float(np.mean((results - sigmoid(scale * (features @ vector))) ** 2))
+
+
+def fit_scale(features, results, vector):
+    """
+    Find the scale that best turns the evaluation scores into win probabilities.
+
+    Parameters:
+        features (numpy.ndarray): The feature matrix.
+        results (numpy.ndarray): The game results.
+        vector (numpy.ndarray): The weights, as returned by to_vector.
+
+    Returns:
+        float: The scale with the smallest error.
+    """
+    scales = np.logspace(-3, 1, 81)
+    return float(min(scales, key=lambda scale: error(features, results, vector, scale)))
+
+
+def fit_weights(features, results, vector, scale, epochs=20, batch_size=65536, learning_rate=0.01, seed=0):
+    """
+    Fit the weights with mini-batch gradient descent (Adam) on the mean squared error.
+
+    Parameters:
+        features (numpy.ndarray): The feature matrix.
+        results (numpy.ndarray): The game results.
+        vector (numpy.ndarray): The starting weights, as returned by to_vector.
+        scale (float): The factor turning evaluation scores into win probabilities.
+        epochs (int): The number of passes over the data.
+        batch_size (int): The number of positions per gradient step.
+        learning_rate (float): The Adam step size.
+        seed (int): The seed for shuffling the positions.
+
+    Returns:
+        numpy.ndarray: The fitted weights.
+    """
+    rng = np.random.default_rng(seed)
+    vector = vector.astype(np.float64)
+    first_moment = np.zeros_like(vector)
+    second_moment = np.zeros_like(vector)
+    step = 0
+
+    for epoch in range(epochs):
+        order = rng.permutation(len(results))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            x, y = features[batch], results[batch]
+            predicted = sigmoid(scale * (x @ vector))
+            gradient = (2 * scale / len(batch)) * (((predicted - y) * predicted * (1 - predicted)) @ x)
+
+            step += 1
+            first_moment = 0.9 * first_moment + 0.1 * gradient
+            second_moment = 0.999 * second_moment + 0.001 * gradient ** 2
+            corrected_first = first_moment / (1 - 0.9 ** step)
+            corrected_second = second_moment / (1 - 0.999 ** step)
+            vector = vector - learning_rate * corrected_first / (np.sqrt(corrected_second) + 1e-8)
+
+        print(f"epoch {epoch + 1}: error {error(features, results, vector, scale):.6f}", file=sys.stderr)
+
+    return vector
+
+
+def main():
+    """
+    Parse the command line arguments and fit the weights.
+    """
+    parser = argparse.ArgumentParser(description="Fit the Halma evaluation weights to game results.")
+    parser.add_argument('dataset', help="file of '<layout> <result>' lines")
+    parser.add_argument('--output', default=WEIGHTS_FILE, help="weights file to write")
+    parser.add_argument('--epochs', type=int, default=20, help="passes over the data")
+    parser.add_argument('--batch-size', type=int, default=65536, help="positions per gradient step")
+    parser.add_argument('--learning-rate', type=float, default=0.01, help="gradient descent step size")
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    features, results = read_features(args.dataset)
+    print(f"read {len(results)} positions in {time.monotonic() - start:.1f}s", file=sys.stderr)
+
+    vector = to_vector(EVAL_WEIGHTS)
+    scale = fit_scale(features, results, vector)
+    print(f"scale {scale:.4f}, starting error {error(features, results, vector, scale):.6f}", file=sys.stderr)
+
+    vector = fit_weights(features, results, vector, scale, args.epochs, args.batch_size, args.learning_rate)
+    weights = from_vector(vector)
+    save_weights(weights, args.output)
+    print(f"wrote {weights} to {args.output} after {time.monotonic() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()